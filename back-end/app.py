@@ -1,12 +1,29 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, StreamingResponse
-import shutil
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 import os
+import logging
 import asyncio
+import hashlib
+import json
 import time
-from pdf_processor import PDFProcessor
+import uuid
+from pdf_processor import PDFProcessor, PIPELINE_VERSION
+from utils.SummaryGenerator import MODEL_NAME, PREFILTER_RATIO, SUMMARY_MODES, LLM_MODE, get_summary_cache
+from utils.disk_cache import DiskCache
+from utils.raster_cache import RenderProfile
+from utils import progress_events
+from utils.progress_events import ProgressPublisher
+from utils.markdown_renderer import MarkdownRenderer
+from utils.job_manager import Job, JobManager, QueueFullError, TTLDict, COMPLETE, FAILED
+from utils.upload_session import UploadSession, ChunkError, UploadClosedError, file_sha256, sweep_upload_sessions
+from utils.page_store import PageStore, sweep_page_stores
+from utils.metrics import Trace, render_prometheus, use_trace
+from utils.page_executor import shutdown_process_pools
 from fastapi.middleware.cors import CORSMiddleware
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")  # DEBUG adds per-page/per-chunk lines; CRITICAL silences the pipeline
+logging.basicConfig(level=LOG_LEVEL.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 
 app = FastAPI()
 app.add_middleware(
@@ -15,142 +32,487 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
+    expose_headers=["Retry-After"],  # Lets the browser client honor 429 back-off
 )
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)  # Ensure directory exists
 
-progress_tracker = {}
+RESULT_CACHE_DIR = "result_cache"
+RESULT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB of cached results
+RESULT_CACHE_MAX_AGE = 30 * 24 * 3600  # Drop results unused for 30 days
+PAGE_STORE_DIR = "page_store"  # One directory of extracted pages per processed job, reused by cache hits
+PAGE_STORE_MAX_AGE = RESULT_CACHE_MAX_AGE
+NDJSON = "application/x-ndjson"
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
+SUMMARY_FIELDS = ("pdf_path", "num_pages", "indexed_sections", "section_ranges", "status", "summary_text",
+                  "summary_html", "summary_mode", "processing_time", "cached")
+UPLOAD_READ_SIZE = 1024 * 1024  # Stream uploads to disk (and the hasher) in 1MB reads
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))  # PDFs processed concurrently
+JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", 8))  # Jobs allowed to wait before uploads get 429
+JOB_TTL = 3600  # Seconds finished jobs (and idle upload progress) are kept
+UPLOAD_SESSION_TTL = 24 * 3600  # Seconds an unfinished chunked upload may sit idle before its files are deleted
+RETRY_AFTER_SECONDS = 30
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024  # Matches the front-end's chunk size
+
+progress_tracker = TTLDict(JOB_TTL)
+upload_sessions = TTLDict(JOB_TTL)  # Active chunked uploads by upload id (state is also persisted on disk)
+job_traces = TTLDict(JOB_TTL)  # Per-job stage spans by job id, readable while the job runs
+result_cache = DiskCache(RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_AGE)
+job_manager = JobManager(JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_TTL)
+
+@app.on_event("shutdown")
+def stop_page_workers():
+    """Stops the process-mode page workers, which are shared by every job for the life of the server."""
+    shutdown_process_pools()
 
 def generate_timestamped_filename(original_filename):
-    """Generates a unique filename using a timestamp."""
+    """Generates a unique filename using a timestamp (plus a random suffix, since uploads now run concurrently)."""
     timestamp = time.strftime("%Y%m%d_%H%M%S")
-    return f"uploaded_{timestamp}.pdf"
+    return f"uploaded_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
+
+async def save_upload(file: UploadFile, buffer, hasher):
+    """Streams an upload into `buffer`, feeding the same bytes to `hasher`."""
+    while chunk := await file.read(UPLOAD_READ_SIZE):
+        buffer.write(chunk)
+        hasher.update(chunk)
+
+def result_cache_key(file_digest, summary_mode=LLM_MODE):
+    """Keys cached results by file content, model, pipeline version, summary settings and render profile.
+
+    The profile (OCR_DPI, LAYOUT_DPI, grayscale) changes OCR text and detected charts, so a result
+    rendered under other settings is never served.
+    """
+    return DiskCache.make_key(file_digest, MODEL_NAME, PIPELINE_VERSION, summary_mode, PREFILTER_RATIO,
+                              repr(RenderProfile()))
+
+def process_with_cache(file_path, file_digest, events=None, bypass_cache=False, summary_mode=LLM_MODE,
+                       store_dir=None):
+    """Returns the cached `process_pdf` result for this content, computing and storing it on a miss.
+
+    Pages are written to a PageStore in `store_dir`; a cached result points at the store of the job that
+    computed it, so a hit whose store has since been swept is recomputed. With `bypass_cache` both the
+    result cache and the chunk-summary memo are skipped on read.
+    """
+    key = result_cache_key(file_digest, summary_mode)
+    cached = None if bypass_cache else result_cache.get(key)
+    if cached is not None and os.path.isdir(cached.get("page_store", "")):
+        os.utime(cached["page_store"])  # Keeps the shared store from being swept while it is in use
+        return {**cached, "pdf_path": file_path, "cached": True}
+
+    store = PageStore.create(store_dir or os.path.join(PAGE_STORE_DIR, uuid.uuid4().hex))
+    try:
+        result = PDFProcessor(file_path, events=events, use_summary_cache=not bypass_cache,
+                              summary_mode=summary_mode, page_store=store).process_pdf()
+    finally:
+        store.close()
+    result_cache.put(key, result)
+    return result
+
+def run_job(job, file_path, file_digest, bypass_cache=False, summary_mode=LLM_MODE):
+    """Job body: processes the file (or serves it from the cache), reporting progress to the job."""
+    sweep_page_stores(PAGE_STORE_DIR, PAGE_STORE_MAX_AGE)
+    trace = job_traces[job.id] = Trace(job.id)
+    with use_trace(trace):
+        if file_digest is None:
+            file_digest = file_sha256(file_path)  # Chunks arrived out of order, so hash the assembled file
+        return process_with_cache(file_path, file_digest, events=job, bypass_cache=bypass_cache,
+                                  summary_mode=summary_mode, store_dir=os.path.join(PAGE_STORE_DIR, job.id))
+
+def check_summary_mode(summary_mode):
+    """Rejects unknown `mode` values with a 400 before anything is queued."""
+    if summary_mode not in SUMMARY_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(SUMMARY_MODES)}")
+
+def submit_job(filename, file_path, file_digest=None, bypass_cache=False, summary_mode=LLM_MODE):
+    """Queues processing of an uploaded file, answering 429 when the job queue is full."""
+    try:
+        return job_manager.submit(filename, run_job, file_path, file_digest, bypass_cache, summary_mode)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Server busy: {e}",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+def job_response(job):
+    """Response returned once an upload has been handed to the job manager."""
+    return JSONResponse(status_code=202, content={"filename": job.filename, **job.to_dict()})
 
 @app.post("/upload-pdf/")
-async def upload_pdf(file: UploadFile = File(...)):
+async def upload_pdf(file: UploadFile = File(...), bypass_cache: bool = False, mode: str = LLM_MODE):
     """
-    Handles file upload and starts **instant PDF processing**.
+    Handles file upload and queues the PDF for processing.
+    Returns a job id immediately; poll `/jobs/{job_id}` and fetch `/jobs/{job_id}/result`.
+    `?bypass_cache=true` re-runs processing and every LLM call instead of reusing cached output;
+    `?mode=fast` returns an extractive summary without calling the model.
     """
+    check_summary_mode(mode)
     os.makedirs(UPLOAD_DIR, exist_ok=True)
 
     new_filename = generate_timestamped_filename(file.filename)
     file_path = os.path.join(UPLOAD_DIR, new_filename)
 
+    hasher = hashlib.sha256()
     with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    processor = PDFProcessor(file_path)
-    result = processor.process_pdf()
+        await save_upload(file, buffer, hasher)
 
-    return result  # Directly return the processed result for instant response
+    job = submit_job(new_filename, file_path, hasher.hexdigest(), bypass_cache, mode)
+    return job_response(job)
 
 
 @app.post("/upload-pdf-stream/")
-async def upload_pdf_stream(file: UploadFile = File(...)):
+async def upload_pdf_stream(file: UploadFile = File(...), bypass_cache: bool = False, mode: str = LLM_MODE):
     """
     Streams upload progress and starts processing while sending real-time updates.
+    Every update is a JSON event (see `utils.progress_events`) sent as one SSE `data:` line.
     """
+    check_summary_mode(mode)
     new_filename = generate_timestamped_filename(file.filename)
     file_path = os.path.join(UPLOAD_DIR, new_filename)
 
     progress_tracker[new_filename] = {"progress": 0, "status": "Uploading", "summary": ""}
 
     async def write_file():
+        hasher = hashlib.sha256()
         with open(file_path, "wb") as buffer:
-            while chunk := await file.read(1024 * 1024):  # Read in 1MB chunks
+            while chunk := await file.read(UPLOAD_READ_SIZE):
                 buffer.write(chunk)
+                hasher.update(chunk)
                 progress_tracker[new_filename]["progress"] += len(chunk)
-                yield f"data: Uploading... {progress_tracker[new_filename]['progress']} bytes\n\n"
+                yield sse_event({"event": "upload_progress", "bytes": progress_tracker[new_filename]["progress"]})
 
         progress_tracker[new_filename]["status"] = "Processing"
-        yield f"data: Upload complete! Processing started...\n\n"
+        yield sse_event({"event": "upload_complete", "filename": new_filename})
 
-        async for update in run_processing(file_path, new_filename):
+        async for update in run_processing(file_path, new_filename, hasher.hexdigest(), bypass_cache, mode):
             yield update
 
     return StreamingResponse(write_file(), media_type="text/event-stream")
 
 
-async def run_processing(file_path: str, filename: str) -> AsyncGenerator[str, None]:
+def sse_event(event):
+    """Formats one event dict as a Server-Sent Events message."""
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def run_processing(file_path: str, filename: str, file_digest: str,
+                         bypass_cache: bool = False, summary_mode: str = LLM_MODE) -> AsyncGenerator[str, None]:
     """
-    Runs the PDF processing step-by-step and **streams updates to the client**.
+    Runs the PDF processing in a worker thread and **streams its progress events to the client**.
     """
-    progress_tracker[filename]["status"] = "Extracting index"
-    yield f"data: {filename} - Extracting index section...\n\n"
-    await asyncio.sleep(1)
-
-    progress_tracker[filename]["status"] = "Extracting pages"
-    yield f"data: {filename} - Extracting pages...\n\n"
-    extracted_data = await asyncio.to_thread(process_pdf, file_path)
-    await asyncio.sleep(1)
+    queue = asyncio.Queue()
+    publisher = ProgressPublisher(queue, asyncio.get_running_loop())
+
+    try:
+        job = job_manager.submit(filename, run_job, file_path, file_digest, bypass_cache, summary_mode,
+                                 listener=publisher)
+    except QueueFullError as e:
+        progress_tracker[filename]["status"] = progress_events.ERROR
+        yield sse_event({"event": progress_events.ERROR, "message": f"Server busy: {e}"})
+        return
+    try:
+        yield sse_event({"event": "job_queued", "job_id": job.id})
+
+        while (event := await queue.get()) is not None:
+            progress_tracker[filename]["status"] = event["event"]
+            if "pages_done" in event:
+                progress_tracker[filename]["progress_percent"] = int(event["pages_done"] / event["total_pages"] * 100)
+            yield sse_event(event)
+    finally:
+        job.remove_listener(publisher)  # The job keeps running if the client disconnects
+
+    if job.status != COMPLETE:
+        progress_tracker[filename]["status"] = progress_events.ERROR
+        return  # The job already published its error event
+
+    result = job.result
+    progress_tracker[filename]["status"] = "Complete"
+    progress_tracker[filename]["summary"] = result["summary_html"]
+    yield sse_event({
+        "event": progress_events.COMPLETE,
+        "job_id": job.id,
+        "filename": filename,
+        "num_pages": result["num_pages"],
+        "processing_time": result["processing_time"],
+        "cached": result.get("cached", False),
+        "summary_html": result["summary_html"],
+    })
+
+
+def get_upload_session(upload_id):
+    """Returns an active upload session, reloading it from disk after a restart."""
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        session = UploadSession.load(UPLOAD_DIR, upload_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Unknown upload session")
+        upload_sessions[upload_id] = session
+    return session
+
+
+@app.post("/upload-sessions/")
+async def create_upload_session(
+    filename: str = Form(...),
+    fileSize: int = Form(...),
+    chunkSize: int = Form(DEFAULT_CHUNK_SIZE),
+):
+    """
+    Starts a resumable chunked upload: preallocates the file and returns an `upload_id`.
+    Chunks may then be sent to `/upload-pdf-chunk/` concurrently and in any order.
+    """
+    sweep_upload_sessions(UPLOAD_DIR, UPLOAD_SESSION_TTL)
+    try:
+        session = UploadSession.create(UPLOAD_DIR, generate_timestamped_filename(filename), fileSize, chunkSize)
+    except ChunkError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    upload_sessions[session.upload_id] = session
+    progress_tracker[session.filename] = {"progress_percent": 0, "status": "Uploading...", "summary": ""}
+    return session.to_dict()
 
-    progress_tracker[filename]["status"] = "Summarizing content"
-    yield f"data: {filename} - Summarizing content...\n\n"
-    summary = await asyncio.to_thread(generate_summary, extracted_data)
 
-    progress_tracker[filename]["status"] = "Complete"
-    progress_tracker[filename]["summary"] = summary
-    yield f"data: {filename} - Processing complete!\n\n"
-    yield f"data: SUMMARY: {summary}\n\n"
+@app.get("/upload-pdf-chunk/{upload_id}")
+def get_upload_session_status(upload_id: str):
+    """Returns which chunks of an upload have been received, so a client can resume."""
+    return get_upload_session(upload_id).to_dict()
 
 
 @app.post("/upload-pdf-chunk/")
 async def upload_pdf_chunk(
     file: UploadFile = File(...),
+    uploadId: str = Form(...),
     chunkIndex: int = Form(...),
-    totalChunks: int = Form(...),
-    filename: str = Form(...),
+    checksum: str = Form(None),
+    bypassCache: bool = Form(False),
+    summaryMode: str = Form(LLM_MODE),
 ):
     """
     Chunked file upload for large PDFs (5GB+).
-    Chunks are **appended** to reconstruct the original file.
-    Processing starts **only after the final chunk**.
+    Each chunk is written **at its offset** (`chunkIndex * chunkSize`), after checking its
+    length and optional SHA-256 `checksum`; retried or reordered chunks are harmless.
+    Processing is queued once **every chunk** has arrived; that response carries the job id.
+    `bypassCache` on the completing chunk skips the result and summary caches; `summaryMode=fast`
+    asks for the extractive summary.
     """
-    # Generate timestamped filename on the first chunk
-    if chunkIndex == 0:
-        new_filename = generate_timestamped_filename(filename)
-    else:
-        new_filename = filename
-
-    file_path = os.path.join(UPLOAD_DIR, new_filename)
-
-    # Append chunk data to the file
-    with open(file_path, "ab") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    if new_filename not in progress_tracker:
-        progress_tracker[new_filename] = {
-            "uploaded_chunks": 0,
-            "total_chunks": totalChunks,
-            "progress_percent": 0,
-            "status": "Uploading...",
-            "summary": "",
-        }
-
-    progress_tracker[new_filename]["uploaded_chunks"] += 1
-    progress_tracker[new_filename]["progress_percent"] = int(
-        (progress_tracker[new_filename]["uploaded_chunks"] / totalChunks) * 100
-    )
-
-    # ✅ Process file after **final chunk** is received
-    if chunkIndex == totalChunks - 1:
-        processor = PDFProcessor(file_path)
-        result = processor.process_pdf()
-
-        progress_tracker[new_filename]["status"] = "Complete"
-        progress_tracker[new_filename]["summary"] = result["summary_html"]
-
-        return JSONResponse(content={"filename": new_filename, **result})
-
-    return JSONResponse(
-        content={"message": f"Chunk {chunkIndex + 1}/{totalChunks} received", "filename": new_filename}
-    )
+    check_summary_mode(summaryMode)
+    session = get_upload_session(uploadId)
+    data = await file.read()
+    try:
+        await asyncio.to_thread(session.write_chunk, chunkIndex, data, checksum)
+    except UploadClosedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ChunkError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    status = session.to_dict()
+    progress_tracker[session.filename] = {
+        "progress_percent": status["progress_percent"],
+        "status": "Uploading...",
+        "summary": "",
+        "upload_id": session.upload_id,
+    }
+
+    # ✅ Process file once the **last missing chunk** is received
+    if session.claim_for_processing():
+        return queue_upload(session, bypassCache, summaryMode)
+
+    return JSONResponse(content={
+        "message": f"Chunk {chunkIndex + 1}/{session.total_chunks} received",
+        **status,
+    })
+
+
+@app.post("/upload-sessions/{upload_id}/finalize")
+async def finalize_upload_session(upload_id: str, bypassCache: bool = Form(False), summaryMode: str = Form(LLM_MODE)):
+    """
+    Queues processing of a fully received upload whose completing chunk was turned away (429),
+    or returns its job if it is already queued. Answers 409 while chunks are still missing.
+    """
+    check_summary_mode(summaryMode)
+    session = get_upload_session(upload_id)
+    if session.job_id not in (None, "pending"):
+        job = job_manager.get(session.job_id)
+        if job is not None:
+            return job_response(job)
+        return JSONResponse(status_code=202, content={"filename": session.filename, "job_id": session.job_id})
+    if session.claim_for_processing():
+        return queue_upload(session, bypassCache, summaryMode)
+    if not session.is_complete():
+        raise HTTPException(status_code=409, detail=f"{len(session.missing_chunks())} chunks are still missing")
+    raise HTTPException(status_code=409, detail="The upload is being queued; retry shortly",
+                        headers={"Retry-After": "1"})
+
+
+def queue_upload(session, bypass_cache, summary_mode):
+    """Submits a claimed upload; on 429 the claim is released so the client can finalize it later."""
+    try:
+        job = submit_job(session.filename, session.file_path, bypass_cache=bypass_cache, summary_mode=summary_mode)
+    except HTTPException:
+        session.set_job(None)  # Retry through /upload-sessions/{id}/finalize after Retry-After
+        raise
+    session.set_job(job.id)
+    progress_tracker[session.filename] = {**progress_tracker.get(session.filename, {}),
+                                          "status": "Queued", "job_id": job.id}
+    return job_response(job)
+
+
+@app.get("/cache-stats")
+def get_cache_stats():
+    """Returns hit/miss counters for the result cache and the chunk-summary memo cache."""
+    return {"results": result_cache.stats(), "summaries": get_summary_cache().stats()}
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Per-stage duration and payload-size histograms in the Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_TEXT)
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Returns the status and latest progress event of a processing job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/trace")
+def get_job_trace(job_id: str, spans: bool = True):
+    """Returns a job's per-stage totals and (unless `spans=false`) every recorded span, even mid-run."""
+    trace = job_traces.get(job_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    result = trace.to_dict()
+    if not spans:
+        result.pop("spans")
+    return result
+
+
+@app.get("/jobs/{job_id}/summary-stream")
+async def stream_job_summary(job_id: str):
+    """
+    Streams a job's summary text as the model generates it (SSE).
+    Each `summary_token` event carries a fragment of one chunk or reduce-step summary, plus `html`: the
+    rendered HTML of the lines that fragment completed (append it to that stream's HTML; `done` marks a
+    stream's last fragment). Text produced before the client connected is replayed first, one event per
+    stream. The stream ends with `complete` (or `error`).
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+
+    queue = asyncio.Queue()
+    publisher = ProgressPublisher(queue, asyncio.get_running_loop())
+    job.add_listener(publisher, replay=True)
+
+    async def token_events():
+        renderers = {}  # One per (stage, level, chunk) stream, since chunk summaries interleave
+        try:
+            while (event := await queue.get()) is not None:
+                if event["event"] == progress_events.SUMMARY_TOKEN:
+                    key = (event["stage"], event["level"], event["chunk"])
+                    renderer = renderers.setdefault(key, MarkdownRenderer())
+                    html = renderer.feed(event["text"])
+                    if event.get("done"):
+                        html += renderer.close()
+                        del renderers[key]
+                    yield sse_event({**event, "html": html})
+                elif event["event"] == progress_events.ERROR:
+                    yield sse_event(event)
+        finally:
+            job.remove_listener(publisher)
+        if job.status == COMPLETE:
+            yield sse_event({"event": progress_events.COMPLETE, "job_id": job.id,
+                             "cached": job.result.get("cached", False), "summary_html": job.result["summary_html"]})
+
+    return StreamingResponse(token_events(), media_type="text/event-stream")
+
+
+@app.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    """
+    Returns a finished job's `process_pdf` result (202 while it is still queued or running).
+    Page text and charts are not included; fetch them from `/jobs/{job_id}/pages`.
+    """
+    job = finished_job(job_id)
+    if not isinstance(job, Job):
+        return job
+    result = {key: value for key, value in job.result.items() if key != "page_store"}
+    return {"job_id": job.id, "filename": job.filename, **result}
+
+
+@app.get("/jobs/{job_id}/summary")
+def get_job_summary(job_id: str):
+    """Returns just the summary and document-level fields of a finished job, as one NDJSON line."""
+    job = finished_job(job_id)
+    if not isinstance(job, Job):
+        return job
+    summary = {"job_id": job.id, "filename": job.filename,
+               **{key: job.result[key] for key in SUMMARY_FIELDS if key in job.result}}
+    return Response(json.dumps(summary) + "\n", media_type=NDJSON)
+
+
+@app.get("/jobs/{job_id}/pages")
+def get_job_pages(job_id: str, start: int = 1, end: Optional[int] = None):
+    """
+    Streams pages `start`..`end` (inclusive; all by default) as NDJSON, one `{"page", "text", "charts"}`
+    object per line, straight from the job's page store. While the job runs, the pages extracted so far.
+    """
+    store = job_page_store(job_id)
+    if not isinstance(store, PageStore):
+        return store
+    return StreamingResponse(store.iter_range(start, end), media_type=NDJSON)
+
+
+@app.get("/jobs/{job_id}/pages/{page_number}")
+def get_job_page(job_id: str, page_number: int):
+    """Returns one page as a single NDJSON line (404 if it has not been extracted)."""
+    store = job_page_store(job_id)
+    if not isinstance(store, PageStore):
+        return store
+    line = store.read_page(page_number)
+    if line is None:
+        raise HTTPException(status_code=404, detail=f"Page {page_number} is not available")
+    return Response(line, media_type=NDJSON)
+
+
+def finished_job(job_id):
+    """Returns the completed Job, or the 202 response to send while it is still queued or running."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != COMPLETE:
+        return JSONResponse(status_code=202, content=job.to_dict())
+    return job
+
+
+def job_page_store(job_id):
+    """Returns the job's PageStore (readable while it is written), or a 202 response before it exists."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status == COMPLETE:
+        if not os.path.isdir(job.result["page_store"]):
+            raise HTTPException(status_code=404, detail="The job's pages have expired")
+        return PageStore(job.result["page_store"])
+    directory = os.path.join(PAGE_STORE_DIR, job.id)
+    if not os.path.isdir(directory):
+        return JSONResponse(status_code=202, content=job.to_dict())
+    return PageStore(directory)
 
 
 @app.get("/progress/{filename}")
 def get_progress(filename: str):
-    """Returns processing progress for a specific file."""
-    return progress_tracker.get(
+    """Returns upload progress for a file, plus the status of its processing job once queued."""
+    progress = dict(progress_tracker.get(
         filename, {"progress_percent": 0, "status": "Not Found", "summary": ""}
-    )
+    ))
+    job = job_manager.find_by_filename(filename)
+    if job is not None:
+        progress["job"] = job.to_dict()
+        if job.status == COMPLETE:
+            progress["status"] = "Complete"
+            progress["summary"] = job.result["summary_html"]
+    return progress
@@ -0,0 +1,71 @@
+"""Peak memory per pipeline stage as documents grow, with and without a memory budget.
+
+Run from `back-end/`:
+    python -m benchmarks.bench_memory --pages 500 2000 5000 --budget-mb 512
+Every (size, budget) pair runs `PDFProcessor.process_pdf` in a fresh child
+process (peak RSS is per process) against a mock Ollama slow enough that
+chunks queue up behind the model, and prints the child's per-stage report.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from benchmarks.mock_ollama import MockOllamaServer
+from benchmarks.synthetic_pdf import write_text_pdf
+
+
+def run_child(pdf_path, budget_mb, mode, work_dir):
+    """Child process body: processes one PDF and prints its memory report as JSON."""
+    from pdf_processor import PDFProcessor
+    from utils.memory_budget import MemoryBudget
+    from utils.page_store import PageStore
+
+    budget = MemoryBudget(budget_mb * 2**20) if budget_mb else None
+    store = PageStore.create(tempfile.mkdtemp(dir=work_dir))
+    try:
+        result = PDFProcessor(pdf_path, use_summary_cache=False, summary_mode=mode, page_store=store,
+                              memory_budget=budget).process_pdf()
+    finally:
+        store.close()
+    print(json.dumps(result["memory_report"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[500, 2000, 5000])
+    parser.add_argument("--budget-mb", type=int, default=512)
+    parser.add_argument("--mode", default="llm", help="Summary mode: llm (mock model) or fast.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock seconds per model request.")
+    parser.add_argument("--child", nargs=3, metavar=("PDF", "BUDGET_MB", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        pdf_path, budget_mb, work_dir = args.child
+        run_child(pdf_path, int(budget_mb), args.mode, work_dir)
+        return
+
+    server = MockOllamaServer(latency=args.latency).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_memory_") as work_dir:
+            env = {**os.environ, "OLLAMA_API_URL": server.url,
+                   "SUMMARY_CACHE_DIR": os.path.join(work_dir, "summary_cache")}
+            print(f"{'pages':>6} {'budget':>8} {'stage':<10} {'seconds':>8} {'rss end':>9} {'peak rss':>9}")
+            for pages in args.pages:
+                pdf_path = write_text_pdf(os.path.join(work_dir, f"doc_{pages}.pdf"), pages)
+                for budget_mb in (0, args.budget_mb):
+                    output = subprocess.run(
+                        [sys.executable, "-m", "benchmarks.bench_memory", "--mode", args.mode,
+                         "--child", pdf_path, str(budget_mb), work_dir],
+                        env=env, capture_output=True, text=True, check=True).stdout
+                    report = json.loads(output.strip().splitlines()[-1])
+                    for stage, entry in report.items():
+                        print(f"{pages:>6} {budget_mb or '-':>8} {stage:<10} {entry['seconds']:>8.1f} "
+                              f"{entry['rss_end_mb']:>6.0f} MB {entry['peak_rss_mb']:>6.0f} MB")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
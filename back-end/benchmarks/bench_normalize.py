@@ -0,0 +1,103 @@
+"""Text normalization throughput (MB/s): the old multi-pass cleaners vs. TextNormalizer.
+
+Run from `back-end/`:
+    python -m benchmarks.bench_normalize --pages 2000 --repeat 3
+Pages are synthetic OCR output: ragged line breaks, hyphenation, runs of
+spaces, page numbers and figures, smart quotes, bullets and speckle noise.
+"""
+import argparse
+import random
+import re
+import time
+from benchmarks.synthetic_pdf import WORDS
+from utils.text_normalizer import TextNormalizer, WHITESPACE_MODE, REFINE_MODE
+
+NOISE = ["•", "’", "“", "”", "—", "|", "~", "©", "»", "_", "^", "¬", "€", "°"]
+
+
+def legacy_clean_text(text):
+    """PDFProcessor.clean_text as it was."""
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+
+def legacy_refine_text(text):
+    """TextRefiner.remove_unwanted_patterns as it was."""
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'\b\d{3,}\b', '', text)
+    text = re.sub(r'[^a-zA-Z0-9\s,.\-\'"()\[\]%]', '', text)
+    return text
+
+
+def ocr_page(rng, lines=45):
+    """One page of text that looks like Tesseract output on a scanned report."""
+    out = [f"{rng.randint(1, 999)}  ANNUAL REPORT {rng.randint(1990, 2030)}", ""]
+    for _ in range(lines):
+        words = []
+        for _ in range(rng.randint(6, 14)):
+            roll = rng.random()
+            if roll < 0.06:
+                words.append(str(rng.randint(100, 999999)))
+            elif roll < 0.10:
+                words.append(f"{rng.randint(1, 99)}.{rng.randint(0, 9)}%")
+            elif roll < 0.14:
+                words.append(rng.choice(NOISE))
+            else:
+                words.append(rng.choice(WORDS))
+        line = ("  " if rng.random() < 0.2 else " ").join(words)
+        if rng.random() < 0.15:
+            line += "-"  # Hyphenated at the line end
+        out.append(line)
+        if rng.random() < 0.1:
+            out.append("")
+    return "\n".join(out) + "\n\f"
+
+
+def megabytes(pages):
+    return sum(len(page.encode("utf-8")) for page in pages) / 1e6
+
+
+def measure(function, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(pages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    pages = [ocr_page(rng) for _ in range(args.pages)]
+    ascii_pages = [page.encode("ascii", "ignore").decode("ascii") for page in pages]
+    clean, refine = TextNormalizer(WHITESPACE_MODE), TextNormalizer(REFINE_MODE)
+
+    for page in pages[:200]:
+        assert clean.normalize(page) == legacy_clean_text(page)
+        assert refine.normalize(page) == " ".join(legacy_refine_text(page).split())
+    for page in ascii_pages[:200]:
+        assert refine.normalize(page) == " ".join(legacy_refine_text(page).split())
+
+    # The old pipelines cleaned OCR text twice (once per image, again per page)
+    rows = [
+        ("legacy clean_text x2 (server OCR path)", lambda ps: [legacy_clean_text(legacy_clean_text(p)) for p in ps], pages),
+        ("legacy TextRefiner x2 (CLI OCR path)", lambda ps: [legacy_refine_text(legacy_refine_text(p)) for p in ps], pages),
+        ("TextNormalizer whitespace", clean.normalize_batch, pages),
+        ("TextNormalizer refine", refine.normalize_batch, pages),
+        ("TextNormalizer refine, ASCII-only pages", refine.normalize_batch, ascii_pages),
+    ]
+    print(f"{args.pages} pages, {megabytes(pages):.1f} MB of synthetic OCR text")
+    for label, function, inputs in rows:
+        seconds = measure(function, inputs, args.repeat)
+        print(f"{label:<42} {megabytes(inputs) / seconds:>8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
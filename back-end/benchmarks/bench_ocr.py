@@ -0,0 +1,56 @@
+"""Per-image OCR latency: one tesseract process per call vs. the pooled/batched OCR backends.
+
+Run from `back-end/` (needs the tesseract binary; tesserocr is optional):
+    python -m benchmarks.bench_ocr --images 40
+"""
+import argparse
+import time
+import pytesseract
+from PIL import Image, ImageDraw
+from benchmarks.synthetic_pdf import WORDS
+from utils import ocr_backend
+
+CONFIG = r'--oem 3 --psm 6'
+
+
+def make_crops(count, size=(600, 160)):
+    """Synthetic chart-label crops: a few lines of words and numbers in black on white."""
+    crops = []
+    for index in range(count):
+        image = Image.new("L", size, 255)
+        draw = ImageDraw.Draw(image)
+        for line in range(3):
+            words = " ".join(WORDS[(index + line + k) % len(WORDS)] for k in range(4))
+            draw.text((10, 10 + line * 45), f"{words} {index * 7 + line}.5", fill=0)
+        crops.append(image.resize((size[0] * 2, size[1] * 2)))
+    return crops
+
+
+def time_per_image(label, fn, crops):
+    start = time.perf_counter()
+    fn(crops)
+    elapsed = (time.perf_counter() - start) * 1000 / len(crops)
+    print(f"{label:<34} {elapsed:>10.1f} ms/image")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=40)
+    args = parser.parse_args()
+    crops = make_crops(args.images)
+
+    time_per_image("subprocess per call (pytesseract)",
+                   lambda images: [pytesseract.image_to_string(image, config=CONFIG) for image in images], crops)
+    time_per_image("batched tesseract CLI",
+                   lambda images: ocr_backend.TesseractCLIBackend().image_to_string_batch(images, CONFIG), crops)
+    if ocr_backend.tesserocr is not None:
+        backend = ocr_backend.TesserocrBackend()
+        backend.image_to_string_batch(crops[:backend.workers], CONFIG)  # Load the models outside the timed run
+        time_per_image("persistent tesserocr pool",
+                       lambda images: backend.image_to_string_batch(images, CONFIG), crops)
+    else:
+        print("tesserocr not installed; skipping the persistent-worker backend")
+
+
+if __name__ == "__main__":
+    main()
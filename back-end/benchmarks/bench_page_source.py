@@ -0,0 +1,54 @@
+"""Per-page text extraction cost: reopen-per-page vs. the shared PageSource.
+
+Run from `back-end/`:  python -m benchmarks.bench_page_source --pages 50 200 800
+"""
+import argparse
+import os
+import tempfile
+import time
+import PyPDF2
+from benchmarks.synthetic_pdf import write_text_pdf
+from utils.page_source import PageSource
+
+
+def reopen_per_page(pdf_path, num_pages):
+    """The previous behaviour: a fresh PdfReader for every page."""
+    for page_number in range(1, num_pages + 1):
+        with open(pdf_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            reader.pages[page_number - 1].extract_text()
+
+
+def shared_source(pdf_path, num_pages):
+    with PageSource(pdf_path) as source:
+        for page_number in range(1, num_pages + 1):
+            source.extract_text(page_number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--skip-legacy-above", type=int, default=800,
+                        help="Skip the reopen-per-page run for larger documents (it is quadratic).")
+    args = parser.parse_args()
+
+    print(f"{'pages':>7} {'reopen ms/page':>15} {'shared ms/page':>15}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            pdf_path = write_text_pdf(os.path.join(tmp, f"bench_{num_pages}.pdf"), num_pages)
+
+            legacy = float("nan")
+            if num_pages <= args.skip_legacy_above:
+                start = time.perf_counter()
+                reopen_per_page(pdf_path, num_pages)
+                legacy = (time.perf_counter() - start) * 1000 / num_pages
+
+            start = time.perf_counter()
+            shared_source(pdf_path, num_pages)
+            shared = (time.perf_counter() - start) * 1000 / num_pages
+
+            print(f"{num_pages:>7} {legacy:>15.3f} {shared:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
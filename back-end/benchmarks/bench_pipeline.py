@@ -0,0 +1,231 @@
+"""Whole-pipeline benchmark: pages/sec, per-stage time, job latency and peak RSS on synthetic PDFs.
+
+Run from `back-end/`:
+    python -m benchmarks.bench_pipeline --kinds text scanned chart --pages 10 100 1000 --runs 3 \\
+        --output after.json --compare before.json
+Each job runs `PDFProcessor.process_pdf` in a fresh child process (peak RSS is
+per process) against a mock Ollama with the given latency. The PDFs are
+generated deterministically, so two result files taken on the same machine
+compare like for like. Results go to `--output` (or stdout) as JSON and a
+table goes to stderr; `--compare` adds the change against an earlier file and
+`--max-regression` makes a slowdown beyond that percentage exit non-zero.
+Every kind needs poppler's `pdftoppm` and `tesseract` on PATH, like the app
+itself: chart detection rasterizes every page, text pages included, so the
+suite refuses to start without them. A job that fails anyway is recorded with
+its error instead of stopping the suite.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.mock_ollama import MockOllamaServer
+from benchmarks.synthetic_pdf import PAGE_KINDS, MIXED, write_pdf
+
+SCHEMA_VERSION = 1  # Bump when result fields change meaning, so comparisons across versions are refused
+COMPARED = (  # (label, path into a result, True if higher is better)
+    ("pages/s", ("pages_per_sec",), True),
+    ("job p50 s", ("job_seconds", "p50"), False),
+    ("job p95 s", ("job_seconds", "p95"), False),
+    ("peak RSS MB", ("peak_rss_mb",), False),
+)
+REQUIRED_TOOLS = ("pdftoppm", "tesseract")  # Page rasterization (every page) and OCR
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_child(pdf_path, mode, budget_mb, execution_mode, work_dir):
+    """Child process body: processes one PDF and prints its timings as one JSON line."""
+    from pdf_processor import PDFProcessor
+    from utils.memory_budget import MemoryBudget, peak_rss
+    from utils.metrics import Trace
+    from utils.page_store import PageStore
+
+    budget = MemoryBudget(budget_mb * 2**20) if budget_mb else None
+    trace = Trace(max_spans=sys.maxsize)
+    store = PageStore.create(tempfile.mkdtemp(dir=work_dir))
+    start = time.perf_counter()
+    try:
+        result = PDFProcessor(pdf_path, execution_mode=execution_mode, use_summary_cache=False, summary_mode=mode,
+                              page_store=store, memory_budget=budget, trace=trace).process_pdf()
+    finally:
+        store.close()
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "pages": result["num_pages"],
+        "stages": trace.totals(),
+        "page_seconds": [span["duration_ms"] / 1000 for span in trace.spans if span["stage"] == "page"],
+        "peak_rss_mb": round(peak_rss() / 2**20, 1),
+    }))
+
+
+def run_job(pdf_path, args, work_dir, env):
+    """Runs one job in a child process and returns its timings, or {"error": ...}."""
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--mode", args.mode, "--execution-mode",
+         args.execution_mode, "--child", pdf_path, str(args.budget_mb), work_dir],
+        env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(kind, pages, jobs, model_requests):
+    """Folds the runs of one (kind, pages) configuration into a result entry."""
+    entry = {"kind": kind, "pages": pages, "runs": len(jobs)}
+    failed = [job["error"] for job in jobs if "error" in job]
+    if failed:
+        return {**entry, "error": failed[0]}
+    seconds = [job["seconds"] for job in jobs]
+    page_seconds = [value for job in jobs for value in job["page_seconds"]]
+    stages = {}
+    for name in sorted({name for job in jobs for name in job["stages"]}):
+        totals = [job["stages"].get(name, {"count": 0, "seconds": 0.0, "bytes": 0}) for job in jobs]
+        stages[name] = {
+            "seconds": round(statistics.median(total["seconds"] for total in totals), 3),
+            "count": round(statistics.median(total["count"] for total in totals)),
+            "bytes": round(statistics.median(total["bytes"] for total in totals)),
+        }
+    return {
+        **entry,
+        "pages_per_sec": round(pages / statistics.median(seconds), 2),
+        "job_seconds": {"p50": round(percentile(seconds, 0.5), 3), "p95": round(percentile(seconds, 0.95), 3),
+                        "min": round(min(seconds), 3), "max": round(max(seconds), 3)},
+        "page_ms": {"p50": round(percentile(page_seconds, 0.5) * 1000, 2),
+                    "p95": round(percentile(page_seconds, 0.95) * 1000, 2)} if page_seconds else None,
+        "stages": stages,
+        "peak_rss_mb": max(job["peak_rss_mb"] for job in jobs),
+        "model_requests": round(model_requests / len(jobs)),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def lookup(result, path):
+    for key in path:
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(report, baseline, max_regression=None):
+    """Prints each compared metric against the baseline report; returns the regressions beyond `max_regression` %."""
+    if baseline.get("schema") != SCHEMA_VERSION:
+        raise SystemExit(f"Baseline schema {baseline.get('schema')} does not match {SCHEMA_VERSION}")
+    if baseline["settings"] != report["settings"]:
+        print(f"Warning: settings differ from the baseline's {baseline['settings']}", file=sys.stderr)
+    previous = {(entry["kind"], entry["pages"]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"\n{'kind':<8} {'pages':>6} {'metric':<12} {'before':>10} {'after':>10} {'change':>8}", file=sys.stderr)
+    for entry in report["results"]:
+        before = previous.get((entry["kind"], entry["pages"]))
+        if before is None or "error" in entry or "error" in before:
+            continue
+        for label, path, higher_is_better in COMPARED:
+            old, new = lookup(before, path), lookup(entry, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = " !" if max_regression is not None and worse > max_regression else ""
+            if flag:
+                regressions.append(f"{entry['kind']}/{entry['pages']} {label} {change:+.1f}%")
+            print(f"{entry['kind']:<8} {entry['pages']:>6} {label:<12} {old:>10} {new:>10} {change:>+7.1f}%{flag}",
+                  file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--kinds", nargs="+", choices=PAGE_KINDS + (MIXED,), default=list(PAGE_KINDS))
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=3, help="Jobs per configuration (for p50/p95 job latency).")
+    parser.add_argument("--mode", default="llm", help="Summary mode: llm (mock model) or fast.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock seconds per model request.")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--budget-mb", type=int, default=0, help="Run with this MEMORY_BUDGET (0: unbounded).")
+    parser.add_argument("--execution-mode", default="thread", help="Page execution mode: thread or process.")
+    parser.add_argument("--output", help="Write the JSON results here instead of stdout.")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    parser.add_argument("--max-regression", type=float, help="Exit 1 if a compared metric worsens by more than this %%.")
+    parser.add_argument("--child", nargs=3, metavar=("PDF", "BUDGET_MB", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        pdf_path, budget_mb, work_dir = args.child
+        run_child(pdf_path, args.mode, int(budget_mb), args.execution_mode, work_dir)
+        return
+
+    missing = [tool for tool in REQUIRED_TOOLS if shutil.which(tool) is None]
+    if missing:
+        raise SystemExit(f"{', '.join(missing)} not found on PATH: install poppler-utils and tesseract-ocr "
+                         "(every page is rasterized for chart detection, even text pages)")
+
+    server = MockOllamaServer(latency=args.latency, jitter=args.jitter).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+            env = {**os.environ, "OLLAMA_API_URL": server.url, "LOG_LEVEL": "WARNING",
+                   "SUMMARY_CACHE_DIR": os.path.join(work_dir, "summary_cache")}
+            print(f"{'kind':<8} {'pages':>6} {'pages/s':>8} {'p50 s':>8} {'p95 s':>8} {'page p95':>9} "
+                  f"{'peak rss':>9}  slowest stages", file=sys.stderr)
+            for kind in args.kinds:
+                for pages in args.pages:
+                    pdf_path = write_pdf(os.path.join(work_dir, f"{kind}_{pages}.pdf"), pages, kind)
+                    requests_before = server.requests
+                    jobs = [run_job(pdf_path, args, work_dir, env) for _ in range(args.runs)]
+                    entry = summarize(kind, pages, jobs, server.requests - requests_before)
+                    results.append(entry)
+                    os.remove(pdf_path)
+                    if "error" in entry:
+                        print(f"{kind:<8} {pages:>6}  failed: {entry['error']}", file=sys.stderr)
+                        continue
+                    slowest = sorted(entry["stages"].items(), key=lambda item: -item[1]["seconds"])[:3]
+                    page_p95 = entry["page_ms"]["p95"] if entry["page_ms"] else 0
+                    print(f"{kind:<8} {pages:>6} {entry['pages_per_sec']:>8.1f} {entry['job_seconds']['p50']:>8.2f} "
+                          f"{entry['job_seconds']['p95']:>8.2f} {page_p95:>6.1f} ms {entry['peak_rss_mb']:>6.0f} MB  "
+                          + ", ".join(f"{name} {stage['seconds']:.2f}s" for name, stage in slowest), file=sys.stderr)
+    finally:
+        server.stop()
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+        "settings": {"runs": args.runs, "mode": args.mode, "latency": args.latency, "jitter": args.jitter,
+                     "budget_mb": args.budget_mb, "execution_mode": args.execution_mode},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("Regressions: " + "; ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Section allocation: the per-line x per-title scan vs. the single-pass SectionMatcher.
+
+Run from `back-end/`:
+    python -m benchmarks.bench_section_allocation --lines 1000000 --sections 300
+The legacy scan is timed on the first `--legacy-lines` lines and extrapolated.
+"""
+import argparse
+import random
+import time
+from benchmarks.synthetic_pdf import WORDS
+from utils.section_index import SectionMatcher
+
+
+def legacy_allocation(text, titles):
+    """The previous algorithm: every line against every title, lowercasing both each time."""
+    counts = {title: 0 for title in titles}
+    current_section = None
+    for line in text.split("\n"):
+        for title in titles:
+            if title.lower() in line.lower():
+                current_section = title
+        if current_section:
+            counts[current_section] += len(line.split())
+    return counts
+
+
+def make_document(num_lines, titles, rng):
+    """Body lines of random words with each title used as a heading at an even interval."""
+    lines = []
+    interval = max(1, num_lines // len(titles))
+    for index in range(num_lines):
+        if index % interval == 0 and index // interval < len(titles):
+            lines.append(f"{index // interval + 1}. {titles[index // interval]}")
+        else:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(10)))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--sections", type=int, default=300)
+    parser.add_argument("--legacy-lines", type=int, default=20_000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    titles = [" ".join(rng.choice(WORDS) for _ in range(3)).title() + f" {i}" for i in range(1, args.sections + 1)]
+    text = make_document(args.lines, titles, rng)
+    sample = "\n".join(text.split("\n")[:args.legacy_lines])
+
+    start = time.perf_counter()
+    expected = legacy_allocation(sample, titles)
+    legacy = (time.perf_counter() - start) * args.lines / args.legacy_lines
+
+    start = time.perf_counter()
+    matcher = SectionMatcher(titles)
+    counts = matcher.count_words(text, {})
+    single_pass = time.perf_counter() - start
+
+    sample_counts = SectionMatcher(titles).count_words(sample, {})
+    assert all(sample_counts.get(title, 0) == count for title, count in expected.items()), "results differ"
+
+    print(f"{args.lines:,} lines, {args.sections} sections, {len(text) / 1e6:.0f} MB")
+    print(f"{'legacy per-line x per-title (extrapolated)':<44} {legacy:>8.2f} s")
+    print(f"{'single-pass SectionMatcher':<44} {single_pass:>8.2f} s")
+    print(f"{len(counts)} sections attributed; speed-up x{legacy / single_pass:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Map-reduce summarization throughput and time to first token against a mock Ollama.
+
+Run from `back-end/`:
+    python -m benchmarks.bench_summarize --chunks 16 --latency 0.25 --concurrency 1 2 4 8
+"""
+import argparse
+import statistics
+import threading
+import time
+from benchmarks.mock_ollama import MockOllamaServer
+from benchmarks.synthetic_pdf import WORDS
+from utils import progress_events
+from utils.ollama_client import OllamaClient
+from utils.SummaryGenerator import SummaryGenerator
+
+
+class TimedClient(OllamaClient):
+    """Records the wall time of every streamed generation, including time spent waiting for a slot."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+        self._latency_lock = threading.Lock()
+
+    def generate_stream(self, model, prompt, **payload):
+        start = time.perf_counter()
+        try:
+            yield from super().generate_stream(model, prompt, **payload)
+        finally:
+            with self._latency_lock:
+                self.latencies.append(time.perf_counter() - start)
+
+
+class FirstTokenClock:
+    """Stands in for a progress publisher and notes when the first summary text arrives."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first_token = None
+
+    def publish(self, event_type, **fields):
+        if event_type == progress_events.SUMMARY_TOKEN and self.first_token is None:
+            self.first_token = time.perf_counter() - self.start
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--chunk-tokens", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.25, help="Mock seconds per request.")
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    words = [WORDS[i % len(WORDS)] for i in range(args.chunks * args.chunk_tokens * 3 // 5)]  # ~0.6 words/token
+    text = " ".join(" ".join(words[i:i + 12]) + "." for i in range(0, len(words), 12))
+    server = MockOllamaServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate).start()
+    print(f"{'concurrency':>11} {'calls':>6} {'wall s':>8} {'chunks/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'peak':>5} "
+          f"{'first token ms':>15}")
+    try:
+        for concurrency in args.concurrency:
+            server.max_in_flight = 0
+            client = TimedClient(server.url, concurrency=concurrency)
+            clock = FirstTokenClock()
+            generator = SummaryGenerator(text, client=client, concurrency=concurrency,
+                                         token_budget=args.chunk_tokens, events=clock)
+            chunks = len(generator.chunk_text(text))
+            start = clock.start = time.perf_counter()
+            generator.generate_summary()
+            wall = time.perf_counter() - start
+            latencies = client.latencies
+            print(f"{concurrency:>11} {len(latencies):>6} {wall:>8.2f} {chunks / wall:>9.2f} "
+                  f"{statistics.median(latencies) * 1000:>8.0f} {percentile(latencies, 0.95) * 1000:>8.0f} "
+                  f"{server.max_in_flight:>5} {clock.first_token * 1000:>15.0f}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Stand-in for Ollama's /api/generate with configurable latency and failure rate.
+
+Lets the summarization path be benchmarked (or the app run end to end) without
+a model. Answers `"stream": false` with one JSON body and streaming requests
+with NDJSON fragments spread over the latency. Run from `back-end/`:
+    python -m benchmarks.mock_ollama --port 11434 --latency 0.5
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOllamaServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering generate requests after `latency` (+/- `jitter`) seconds.
+
+    A `failure_rate` share of requests fails with HTTP 503 to exercise client
+    retries. `max_in_flight` records the highest number of concurrent requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.2, jitter=0.0, failure_rate=0.0):
+        super().__init__(("127.0.0.1", port), MockOllamaHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/generate"
+
+    def start(self):
+        """Serves from a daemon thread and returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):  # Pooled clients dropping idle connections
+            super().handle_error(request, client_address)
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def response_text(self, prompt):
+        """A deterministic fake summary: a reasoning block plus the first words of the prompt as bullets."""
+        words = prompt.split()[:60]
+        bullets = "\n".join("- " + " ".join(words[i:i + 10]) for i in range(0, len(words), 10))
+        return f"<think>Reading {len(prompt)} characters.</think>\n**Summary**\n{bullets}"
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so connection pooling is observable
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server._lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = random.random() < server.failure_rate
+            if fail:
+                server.failures += 1
+        try:
+            text = server.response_text(body.get("prompt", ""))
+            if fail:
+                self.send_json(503, {"error": "mock overload"})
+            elif body.get("stream", True):
+                self.send_stream(body.get("model"), text, server.latency + random.uniform(-server.jitter, server.jitter))
+            else:
+                time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+                self.send_json(200, {"model": body.get("model"), "response": text, "done": True})
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, model, text, latency):
+        """Streams `text` word by word as chunked NDJSON, Ollama-style, over `latency` seconds."""
+        fragments = [word + " " for word in text.split(" ")]
+        delay = max(0.0, latency) / (len(fragments) + 1)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for fragment in fragments:
+            time.sleep(delay)
+            self.write_chunk({"model": model, "response": fragment, "done": False})
+        self.write_chunk({"model": model, "response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, message):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output readable
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per request.")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = MockOllamaServer(args.port, args.latency, args.jitter, args.failure_rate)
+    print(f"Mock Ollama listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Minimal PDF writer used to build synthetic benchmark inputs.
+
+Three page kinds cover the pipeline's paths: `text` pages have a text layer,
+`scanned` pages are a single grayscale image with no text layer (OCR
+fallback), and `chart` pages mix body text with a vector bar chart (figure
+detection and region OCR). `mixed` cycles through all three. Output is
+deterministic for a given page count and kind.
+"""
+import random
+import zlib
+from PIL import Image, ImageDraw, ImageFont
+
+WORDS = (
+    "economy growth inflation revenue fiscal policy investment capital market "
+    "infrastructure employment exports agriculture industry services trade "
+    "deficit reform budget sector outlook percent quarter annual report"
+).split()
+TEXT, SCANNED, CHART, MIXED = "text", "scanned", "chart", "mixed"
+PAGE_KINDS = (TEXT, SCANNED, CHART)
+PAGE_SIZE = (595, 842)  # A4 in points
+SCAN_DPI = 100
+SCAN_VARIANTS = 8  # Distinct scans; identical images are written once and shared between pages
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def text_page_stream(page_number, lines=40, rng=None):
+    """Returns a content stream with a heading and `lines` lines of filler text."""
+    rng = rng or random.Random(page_number)
+    ops = ["BT", "/F1 16 Tf", "50 800 Td", f"({_escape(f'{page_number}. Section {page_number}')}) Tj", "/F1 10 Tf"]
+    for _ in range(lines):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + "."
+        ops.append("0 -18 Td")
+        ops.append(f"({_escape(sentence)}) Tj")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def scanned_page_image(variant, lines=40, dpi=SCAN_DPI):
+    """Returns a grayscale A4 "scan": a heading and `lines` lines of filler text, no text layer."""
+    rng = random.Random(f"scan-{variant}")
+    scale = dpi / 72.0
+    image = Image.new("L", (int(PAGE_SIZE[0] * scale), int(PAGE_SIZE[1] * scale)), 250)
+    draw = ImageDraw.Draw(image)
+    font, heading_font = ImageFont.load_default(size=int(10 * scale)), ImageFont.load_default(size=int(16 * scale))
+    draw.text((50 * scale, 42 * scale), f"Scanned section {variant + 1}", fill=20, font=heading_font)
+    for line in range(lines):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(10)).capitalize() + "."
+        draw.text((50 * scale, (70 + line * 18) * scale), sentence, fill=rng.randint(10, 60), font=font)
+    return image
+
+
+def image_xobject(image):
+    """Wraps a grayscale PIL image as a Flate-compressed image XObject."""
+    header = (f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+              f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode").encode()
+    return stream_object(zlib.compress(image.tobytes(), 6), header)
+
+
+def chart_page_stream(page_number, lines=10, bars=6, rng=None):
+    """Returns a content stream with a heading, `lines` lines of text and a labelled bar chart below them."""
+    rng = rng or random.Random(f"chart-{page_number}")
+    ops = [text_page_stream(page_number, lines, rng).decode("latin-1")]
+    left, bottom, width, height = 80, 180, 440, 300
+    ops += ["0.8 G 0.5 w"]
+    ops += [f"{left} {bottom + height * i // 4} m {left + width} {bottom + height * i // 4} l S" for i in range(1, 5)]
+    ops += ["0 G 1.5 w", f"{left} {bottom} m {left + width} {bottom} l S", f"{left} {bottom} m {left} {bottom + height} l S"]
+    slot = width / bars
+    for index in range(bars):
+        value = rng.randint(10, 95)
+        x = left + slot * index + slot * 0.2
+        bar_height = height * value / 100
+        ops.append(f"{0.2 + 0.1 * (index % 4):.1f} g {x:.1f} {bottom} {slot * 0.6:.1f} {bar_height:.1f} re f")
+        ops.append(f"0 g BT /F1 9 Tf {x:.1f} {bottom + bar_height + 6:.1f} Td ({value}.{index}%) Tj ET")
+        ops.append(f"BT /F1 9 Tf {x:.1f} {bottom - 14} Td (Q{index + 1} {2020 + index}) Tj ET")
+    for i in range(5):
+        ops.append(f"BT /F1 8 Tf {left - 24} {bottom + height * i // 4 - 3} Td ({25 * i}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+class PDFBuilder:
+    """Accumulates pages and serializes them as a single-revision PDF with an xref table."""
+
+    def __init__(self):
+        self.pages = []
+
+    def add_page(self, content, resources=b"<< /Font << /F1 3 0 R >> >>", extra_objects=()):
+        """Adds a page with a raw content stream; `extra_objects` are (name, bytes) XObjects."""
+        self.pages.append((content, resources, list(extra_objects)))
+
+    def build(self):
+        objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+                   3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+        kids = []
+        shared = {}  # XObject bytes -> object id, so repeated images are stored once
+        next_id = 4
+        for content, resources, extra in self.pages:
+            page_id, content_id = next_id, next_id + 1
+            next_id += 2
+            xobjects = []
+            for name, data in extra:
+                obj_id = shared.get(data)
+                if obj_id is None:
+                    obj_id = shared[data] = next_id
+                    objects[next_id] = data
+                    next_id += 1
+                xobjects.append(f"/{name} {obj_id} 0 R".encode())
+            if xobjects:
+                resources = resources[:-2] + b" /XObject << " + b" ".join(xobjects) + b" >> >>"
+            objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources "
+                                + resources + f" /Contents {content_id} 0 R >>".encode())
+            objects[content_id] = stream_object(content)
+            kids.append(f"{page_id} 0 R")
+        objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = {}
+        for obj_id in sorted(objects):
+            offsets[obj_id] = len(out)
+            out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+        xref_offset = len(out)
+        size = max(objects) + 1
+        out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+        for obj_id in range(1, size):
+            out += f"{offsets.get(obj_id, 0):010d} 00000 n \n".encode()
+        out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        return bytes(out)
+
+
+def stream_object(data, header=b""):
+    """Wraps raw bytes as a PDF stream object."""
+    return b"<< " + header + f" /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream"
+
+
+def write_pdf(path, num_pages, kind=TEXT, lines=40):
+    """Writes a PDF of `num_pages` pages of one kind (or MIXED, cycling through PAGE_KINDS) and returns its path."""
+    if kind not in PAGE_KINDS + (MIXED,):
+        raise ValueError(f"Unknown page kind {kind!r}; expected one of {PAGE_KINDS + (MIXED,)}")
+    builder = PDFBuilder()
+    scans = {}
+    for page in range(1, num_pages + 1):
+        page_kind = PAGE_KINDS[(page - 1) % len(PAGE_KINDS)] if kind == MIXED else kind
+        if page_kind == TEXT:
+            builder.add_page(text_page_stream(page, lines))
+        elif page_kind == CHART:
+            builder.add_page(chart_page_stream(page))
+        else:
+            variant = page % SCAN_VARIANTS
+            if variant not in scans:
+                scans[variant] = image_xobject(scanned_page_image(variant, lines))
+            builder.add_page(f"q {PAGE_SIZE[0]} 0 0 {PAGE_SIZE[1]} 0 0 cm /Im1 Do Q".encode(), b"<< >>",
+                             [("Im1", scans[variant])])
+    with open(path, "wb") as f:
+        f.write(builder.build())
+    return path
+
+
+def write_text_pdf(path, num_pages, lines=40):
+    """Writes a text-only PDF with `num_pages` pages and returns its path."""
+    return write_pdf(path, num_pages, TEXT, lines)
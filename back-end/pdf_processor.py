@@ -1,169 +1,281 @@
 import requests
-import re
-import nltk
-import PyPDF2
-import pytesseract
 import time
 import os
-import concurrent.futures
-from pdf2image import convert_from_path
-from nltk.tokenize import sent_tokenize
+import logging
 from utils.ChartExtractor import ChartExtractor
-from utils.SummaryGenerator import SummaryGenerator
-
-# Download NLTK tokenization model
-nltk.download('punkt')
+from utils.SummaryGenerator import SummaryGenerator, LLM_MODE
+from utils.page_source import PageSource
+from utils.section_index import SectionIndex, TOC_SCAN_PAGES
+from utils.raster_cache import RasterCache, RenderProfile
+from utils.ocr_backend import get_ocr_backend
+from utils.text_normalizer import normalize_text
+from utils.markdown_renderer import MarkdownRenderer
+from utils.memory_budget import MemoryBudget, MemoryReport, TextSpool
+from utils.metrics import SpanRecorder, current_trace, replay_spans, span, use_trace
+from utils.page_executor import PageExecutor, PageResult, PROCESS_MODE, THREAD_MODE, DEFAULT_WINDOW
+from utils import progress_events
+from utils.progress_events import ProgressEstimator
 
 # Constants
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "deepseek-r1:1.5b"
 MAX_WORKERS = 8  # Optimized threading for fast processing
-EXTRACTED_TEXT_FILE = "extracted_text.txt"
-EXTRACTED_TEXT_DIR = "extracted_text"
+EXECUTION_MODE = os.environ.get("PDF_EXECUTION_MODE", THREAD_MODE)  # "thread" or "process"
+PIPELINE_VERSION = "6"  # Bump whenever extraction/summarization output changes (invalidates cached results)
 
-os.makedirs(EXTRACTED_TEXT_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
 
 
 class PDFProcessor:
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, execution_mode=EXECUTION_MODE, max_workers=None, extract_index=True, events=None,
+                 render_profile=None, use_summary_cache=True, summary_mode=LLM_MODE, page_store=None,
+                 memory_budget=None, trace=None):
         self.pdf_path = pdf_path
+        # Trace the job's stage spans go to (default: the one the calling thread is using, if any)
+        self.trace = trace if trace is not None else current_trace()
+        self.page_store = page_store  # Optional PageStore the pages go to instead of being returned inline
+        # Optional MemoryBudget (default from MEMORY_BUDGET_MB) bounding pages in flight, renders and text
+        self.memory_budget = memory_budget if memory_budget is not None else MemoryBudget.from_env()
+        self.memory_report = MemoryReport()
+        self.summary_mode = summary_mode  # LLM_MODE or FAST_MODE (extractive, no model calls)
+        self.use_summary_cache = use_summary_cache  # False regenerates every chunk summary
+        self.render_profile = render_profile if render_profile is not None else RenderProfile()
+        self.events = events  # Optional ProgressPublisher receiving structured progress events
+        self.execution_mode = execution_mode
+        if max_workers is None and execution_mode == THREAD_MODE:
+            max_workers = MAX_WORKERS
+        budget = self.memory_budget
+        if budget is not None:
+            max_workers = min(max_workers or budget.max_workers, budget.max_workers)
+        self.max_workers = max_workers  # None lets process mode size the pool to the machine
+        self.page_source = PageSource(pdf_path, max_cached_objects=budget.max_cached_objects if budget else None)
+        self.raster_cache = RasterCache(budget.raster_bytes) if budget else RasterCache()
         self.num_pages = self.get_number_of_pages()
-        self.process_status = []
-        self.indexed_sections = self.extract_indexed_sections()
-        self.process_status = []
-        self.timestamp = time.strftime("%Y%m%d_%H%M%S")
-        self.extracted_text_file = os.path.join(EXTRACTED_TEXT_DIR, f"extracted_{self.timestamp}.txt")
+        self.extract_index = extract_index
+        self._scanned_texts = {}  # Text layers read while looking for a TOC, handed to the page pass once
+        # Outline or text-layer TOC only: cheap, so it no longer delays the parallel page work
+        with self.memory_report.stage("index"):
+            self.section_index = self.extract_indexed_sections() if extract_index else SectionIndex([], self.num_pages)
+        self.indexed_sections = self.section_index.as_dict()
+
+    def publish(self, event_type, **fields):
+        """Forwards a progress event to the attached publisher, if any."""
+        if self.events is not None:
+            self.events.publish(event_type, **fields)
 
     def get_number_of_pages(self):
         """Fetches the total number of pages in the PDF."""
-        with open(self.pdf_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            return len(reader.pages)
+        return self.page_source.num_pages
 
     def clean_text(self, text):
         """Cleans extracted text by removing unnecessary whitespace and noise."""
-        text = re.sub(r'\n+', ' ', text)  # Replace multiple newlines with a space
-        text = re.sub(r'\s+', ' ', text).strip()  # Remove extra spaces
-        return text
+        return normalize_text(text)
 
     def extract_text_from_pdf_page(self, page_number):
         """Extracts text from a specific page of a PDF file using OCR if needed."""
-        self.process_status.append({"page": page_number, "status": "Extracting Text"})
-        print(f"\n📄 Extracting text from page {page_number}...")
+        return self.extract_page_text(page_number)[0]
+
+    def extract_page_text(self, page_number):
+        """Extracts a page's text and returns (text, whether the OCR fallback was used)."""
+        logger.debug("📄 Extracting text from page %d...", page_number)
 
         text = ""
-        with open(self.pdf_path, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            if page_number < 1 or page_number > self.num_pages:
-                print(f"❌ Page {page_number} is out of range. PDF has {self.num_pages} pages.")
-                return text
-            page = reader.pages[page_number - 1]
-            extracted_text = page.extract_text()
-            if extracted_text:
-                text += extracted_text
-                print(f"✅ Extracted text from page {page_number}")
-            else:
-                print(f"⚠️ No extractable text on page {page_number}, attempting OCR...")
-                text += self.extract_text_from_images(page_number)
-        
-        return self.clean_text(text)
+        if page_number < 1 or page_number > self.num_pages:
+            logger.warning("❌ Page %d is out of range. PDF has %d pages.", page_number, self.num_pages)
+            return text, False
+        extracted_text = self._scanned_texts.pop(page_number, None)
+        if extracted_text is None:
+            extracted_text = self.page_source.extract_text(page_number)
+        used_ocr = not extracted_text
+        if extracted_text:
+            text += extracted_text
+            logger.debug("✅ Extracted text from page %d", page_number)
+        else:
+            logger.debug("⚠️ No extractable text on page %d, attempting OCR...", page_number)
+            text += self.extract_text_from_images(page_number)
+
+        return self.clean_text(text), used_ocr
 
     def extract_text_from_images(self, page_number):
         """Extracts text from images using OCR."""
-        self.process_status.append({"page": page_number, "status": "Extracting Image"})
-        images = convert_from_path(self.pdf_path, first_page=page_number, last_page=page_number)
+        profile = self.render_profile
+        image = self.raster_cache.get(self.pdf_path, page_number, dpi=profile.ocr_dpi, grayscale=profile.grayscale)
+        images = [image] if image is not None else []
         text = ""
-        for image in images:
-            extracted_text = pytesseract.image_to_string(image)
-            cleaned_text = self.clean_text(extracted_text)
-            if cleaned_text.strip():
-                text += cleaned_text + " "
-                print(f"✅ Extracted text from image-based content on page {page_number}")
+        for extracted_text in get_ocr_backend().image_to_string_batch(images):
+            if extracted_text.strip():  # Normalized once with the rest of the page in extract_page_text
+                text += extracted_text + " "
+                logger.debug("✅ Extracted text from image-based content on page %d", page_number)
         return text
 
     def extract_indexed_sections(self):
-        """Extracts section titles and page numbers from index (assuming Page 3 contains the index)."""
-        print("\n📑 Extracting index sections...")
-        index_text = self.extract_text_from_pdf_page(3)
-        sections = {}
-        matches = re.findall(r'(\d+)\.\s*(.+?)\s+(\d+)', index_text)
-        for match in matches:
-            section_number, section_title, page_number = match
-            sections[int(page_number)] = section_title.strip()
-        print(f"✅ Found {len(sections)} indexed sections.")
-        return sections
+        """Builds the section index from the PDF outline, or else from a table-of-contents page."""
+        logger.debug("📑 Extracting index sections...")
+        index = SectionIndex.build(self.page_source, texts=self._scanned_texts)
+        logger.info("✅ Found %d indexed sections (from %s).", len(index), index.source)
+        self.publish(progress_events.INDEX_EXTRACTED, sections=len(index), source=index.source)
+        return index
+
+    def index_from_ocr_page(self, result, summary_generator):
+        """Scanned documents: looks for a TOC in the OCR text of an early page the index scan found blank."""
+        if not (self.extract_index and result.ocr and result.page <= TOC_SCAN_PAGES and not self.section_index):
+            return
+        entries = SectionIndex.toc_entries(result.text)
+        if not entries:
+            return
+        self.section_index = SectionIndex(entries, self.num_pages, "ocr_toc")
+        self.indexed_sections = self.section_index.as_dict()
+        summary_generator.set_sections(self.section_index)
+        logger.info("✅ Found %d indexed sections (from the OCR text of page %d).", len(self.section_index),
+                    result.page)
+        self.publish(progress_events.INDEX_EXTRACTED, sections=len(self.section_index), source="ocr_toc")
+
+    def process_page_compact(self, page_number):
+        """Processes a single page and returns a compact `PageResult`."""
+        self.publish(progress_events.PAGE_STARTED, page=page_number)
+        text, used_ocr = self.extract_page_text(page_number)
+        chart_extractor = ChartExtractor(self.pdf_path, raster_cache=self.raster_cache,
+                                         render_profile=self.render_profile)
+        chart_data = chart_extractor.extract_charts_from_page(page_number)
+        self.raster_cache.discard_page(self.pdf_path, page_number)  # Both stages are done with it
+        return PageResult.from_charts(page_number, text, chart_data, used_ocr)
 
     def process_page(self, page_number):
         """Processes a single page and returns structured data."""
-        text = self.extract_text_from_pdf_page(page_number)
-        chart_extractor = ChartExtractor(self.pdf_path)
-        chart_data = chart_extractor.extract_charts_from_page(page_number)
+        return self.process_page_compact(page_number).to_dict()
 
-        final_output = {
-            "page": page_number,
-            "text": text,
-            "charts": chart_data
-        }
-        return final_output
+    def publish_range_started(self, start, end):
+        """Process mode: the workers have no publisher, so pages are reported started as their range is queued."""
+        for page_number in range(start, end + 1):
+            self.publish(progress_events.PAGE_STARTED, page=page_number)
+
+    def iter_pages(self, window=DEFAULT_WINDOW):
+        """Yields a `PageResult` per page, in page order, with at most `window` pages in flight."""
+        executor = PageExecutor(self.execution_mode, self.max_workers)
+        on_submit = self.publish_range_started if self.execution_mode == PROCESS_MODE else None
+        try:
+            for result in executor.map_pages(_process_page_task, self.num_pages, context=self,
+                                             context_factory=_worker_processor,
+                                             factory_args=(self.pdf_path, self.render_profile, self.memory_budget),
+                                             window=window, on_submit=on_submit):
+                if result.spans:  # Measured in a process-mode worker
+                    replay_spans(result.spans, self.trace)
+                    result = result._replace(spans=())
+                yield result
+        finally:
+            self.close()
+
+    def close(self):
+        """Releases the PDF reader handles and cached renders (a shared process worker closes idle ones)."""
+        self.page_source.close()
+        self.raster_cache.close()
 
     def process_pdf(self):
         """Processes the entire PDF and returns structured JSON output."""
+        with use_trace(self.trace):  # Spans from this thread (chunking, HTML) join the job's trace
+            return self._process_pdf()
+
+    def _process_pdf(self):
         start_time = time.time()
         extracted_data = []
+        budget = self.memory_budget
+        spool = None
+        if budget is not None:
+            logger.info("🧠 Bounded-memory mode: %s", budget)
+            spool = TextSpool(self.page_store.directory if self.page_store is not None else None)
+        summary_generator = SummaryGenerator(events=self.events, sections=self.section_index,
+                                             use_memo=self.use_summary_cache, mode=self.summary_mode, spool=spool,
+                                             trace=self.trace)
+        progress = ProgressEstimator(self.num_pages)
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = {executor.submit(self.process_page, page): page for page in range(1, self.num_pages + 1)}
-            for future in concurrent.futures.as_completed(futures):
-                page_data = future.result()
-                if page_data:
-                    extracted_data.append(page_data)
-
-        extracted_text = "\n".join([page["text"] for page in extracted_data])
-        with open(EXTRACTED_TEXT_FILE, "w", encoding="utf-8") as f:
-            f.write(extracted_text)
-        print(f"\n📜 Extracted text saved to {EXTRACTED_TEXT_FILE}.")
+        try:
+            # Pages arrive in order; each goes straight to the page store (or the result) and to the summarizer.
+            with self.memory_report.stage("extract"):
+                for result in self.iter_pages(window=budget.window if budget else DEFAULT_WINDOW):
+                    if self.page_store is not None:
+                        self.page_store.append(result.to_dict())
+                    else:
+                        extracted_data.append(result.to_dict())
+                    if result.ocr:
+                        self.publish(progress_events.OCR_FALLBACK, page=result.page)
+                        self.index_from_ocr_page(result, summary_generator)
+                    done, eta = progress.advance()
+                    self.publish(progress_events.PAGE_FINISHED, page=result.page, pages_done=done,
+                                 total_pages=self.num_pages, eta_seconds=eta)
+                    summary_generator.feed(result.text, result.page)
+            if self.page_store is not None:
+                logger.info("📜 Extracted pages saved to %s.", self.page_store.directory)
 
-        # Generate structured summary
-        summary_generator = SummaryGenerator(extracted_text)
-        summary_text = summary_generator.generate_summary()
+            # Generate structured summary
+            self.publish(progress_events.SUMMARY_STARTED)
+            with self.memory_report.stage("summarize"):
+                summary_text = summary_generator.finish()
+        finally:
+            if spool is not None:
+                spool.close()
 
         # Convert to HTML format
-        html_summary = HTMLConverter(summary_text).convert_to_html()
+        with self.memory_report.stage("render"):
+            html_summary = HTMLConverter(summary_text).convert_to_html()
+        peak = max(stage["peak_rss_mb"] for stage in self.memory_report.stages.values())
+        logger.info("🧠 Peak RSS %s MB%s", peak, f" (budget {budget.budget_bytes // 2**20} MB)" if budget else "")
 
         final_output = {
             "pdf_path": self.pdf_path,
             "num_pages": self.num_pages,
             "indexed_sections": self.indexed_sections,
+            "section_ranges": self.section_index.to_list(),
             "status": "Done",
-            "extracted_pages": extracted_data,
             "summary_text": summary_text,
             "summary_html": html_summary,
-            "processing_time": round(time.time() - start_time, 2)
+            "summary_mode": self.summary_mode,
+            "processing_time": round(time.time() - start_time, 2),
+            "memory_report": self.memory_report.as_dict(),
         }
+        if self.trace is not None:
+            final_output["stage_totals"] = self.trace.totals()
+        if self.page_store is not None:
+            final_output["page_store"] = self.page_store.directory
+        else:
+            final_output["extracted_pages"] = extracted_data
         return final_output
 
+def _worker_processor(pdf_path, render_profile, memory_budget=None):
+    """Builds the per-worker processor (own reader and raster cache) used in process mode.
+
+    Its spans go to a SpanRecorder and travel back with each page, since the
+    job's trace and the metrics that are served live in the parent.
+    """
+    return PDFProcessor(pdf_path, execution_mode=THREAD_MODE, extract_index=False,  # Events stay in the parent
+                        render_profile=render_profile, memory_budget=memory_budget, trace=SpanRecorder())
+
+
+def _process_page_task(processor, page_number):
+    with use_trace(processor.trace), span("page", page=page_number):
+        result = processor.process_page_compact(page_number)
+    if isinstance(processor.trace, SpanRecorder):
+        result = result._replace(spans=processor.trace.drain())
+    return result
+
+
 class HTMLConverter:
     """Converts structured text into HTML format for better rendering on web."""
     def __init__(self, text):
         self.text = text
 
     def convert_to_html(self):
-        """Converts summary text into structured HTML format."""
-        html = ""
-
-        for line in self.text.split("\n"):
-            if line.strip().startswith("###"):
-                html += f"<h3>{line.strip()[4:]}</h3>"
-            elif line.strip().startswith("- "):
-                html += f"<ul><li>{line.strip()[2:]}</li></ul>"
-            elif line.strip():
-                html += f"<p>{line.strip()}</p>"
-
-        # html += ""
+        """Converts summary text into structured HTML format (consecutive bullets share one list)."""
+        with span("html", len(self.text)) as record:
+            renderer = MarkdownRenderer()
+            renderer.feed(self.text)
+            renderer.close()
+            html = renderer.getvalue()
+            record.attributes["html_chars"] = len(html)
         return html
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
     pdf_processor = PDFProcessor("Infographics English.pdf")
     result = pdf_processor.process_pdf()
     print(result)
@@ -1,21 +1,18 @@
 import subprocess
 import requests
-import PyPDF2
-import pytesseract
-from pdf2image import convert_from_path
 import os
 import time
 import re
-import nltk
 import argparse
-import concurrent.futures
-from nltk.tokenize import sent_tokenize
+import logging
 from utils.ChartExtractor import ChartExtractor
-from utils.text_refiner import TextRefiner  # Importing text refinement class
-from utils.SummaryGenerator import SummaryGenerator
-
-# Download NLTK tokenization data
-nltk.download('punkt')
+from utils.text_normalizer import normalize_text, REFINE_MODE
+from utils.SummaryGenerator import SummaryGenerator, SUMMARY_MODES, LLM_MODE
+from utils.page_source import PageSource
+from utils.section_index import SectionIndex
+from utils.raster_cache import RasterCache, RenderProfile, LAYOUT_DPI, OCR_DPI
+from utils.ocr_backend import get_ocr_backend
+from utils.page_executor import PageExecutor, EXECUTION_MODES, THREAD_MODE
 
 # Constants
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
@@ -23,72 +20,65 @@ MODEL_NAME = "deepseek-r1:1.5b"
 MAX_WORKERS = 8  # Optimized threading for fast processing
 EXTRACTED_TEXT_DIR = "extracted_text"
 os.makedirs(EXTRACTED_TEXT_DIR, exist_ok=True)  # Ensure directory exists
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")  # DEBUG adds per-page progress; WARNING or higher silences it
+
+logger = logging.getLogger(__name__)
 
 def get_timestamped_filename():
     """Generates a unique timestamped filename for extracted text."""
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     return os.path.join(EXTRACTED_TEXT_DIR, f"extracted_{timestamp}.txt")
 
-def extract_text_from_pdf_page(pdf_path, page_number):
+def extract_text_from_pdf_page(source, page_number, raster_cache=None, render_profile=None):
     """Extracts text from a specific page of a PDF file using OCR if needed."""
-    print(f"\n📄 Extracting text from page {page_number}...")
+    logger.debug("📄 Extracting text from page %d...", page_number)
     text = ""
-    with open(pdf_path, 'rb') as f:
-        reader = PyPDF2.PdfReader(f)
-        num_pages = len(reader.pages)
-        if page_number < 1 or page_number > num_pages:
-            print(f"❌ Page {page_number} is out of range. PDF has {num_pages} pages.")
-            return text
-        page = reader.pages[page_number - 1]
-        extracted_text = page.extract_text()
-        if extracted_text:
-            text += extracted_text
-            print(f"✅ Extracted text from page {page_number}")
-        else:
-            print(f"⚠️ No extractable text on page {page_number}, attempting OCR...")
-            text += extract_text_from_images(pdf_path, page_number)
-
-    # Refine extracted text using TextRefiner
-    refiner = TextRefiner(text)
-    return refiner.refine_text()
-
-def extract_text_from_images(pdf_path, page_number):
+    if page_number < 1 or page_number > source.num_pages:
+        logger.warning("❌ Page %d is out of range. PDF has %d pages.", page_number, source.num_pages)
+        return text
+    extracted_text = source.extract_text(page_number)
+    if extracted_text:
+        text += extracted_text
+        logger.debug("✅ Extracted text from page %d", page_number)
+    else:
+        logger.debug("⚠️ No extractable text on page %d, attempting OCR...", page_number)
+        text += extract_text_from_images(source.pdf_path, page_number, raster_cache, render_profile)
+
+    # Refine extracted text (OCR output included) in one normalization pass
+    return normalize_text(text, REFINE_MODE)
+
+def extract_text_from_images(pdf_path, page_number, raster_cache=None, render_profile=None):
     """Extracts text from images using OCR."""
-    images = convert_from_path(pdf_path, first_page=page_number, last_page=page_number)
+    raster_cache = raster_cache if raster_cache is not None else RasterCache()
+    profile = render_profile if render_profile is not None else RenderProfile()
+    image = raster_cache.get(pdf_path, page_number, dpi=profile.ocr_dpi, grayscale=profile.grayscale)
+    images = [image] if image is not None else []
     text = ""
-    for image in images:
-        extracted_text = pytesseract.image_to_string(image)
-        cleaned_text = TextRefiner(extracted_text).refine_text()  # Clean extracted text
-        if cleaned_text.strip():
-            text += cleaned_text + " "
-            print(f"✅ Extracted text from image-based content on page {page_number}")
+    for extracted_text in get_ocr_backend().image_to_string_batch(images):
+        if extracted_text.strip():  # Refined once with the rest of the page in extract_text_from_pdf_page
+            text += extracted_text + " "
+            logger.debug("✅ Extracted text from image-based content on page %d", page_number)
     return text
 
-def extract_indexed_sections(pdf_path):
-    """Extracts section titles and page numbers from index."""
-    print("\n📑 Extracting index sections...")
-    index_text = extract_text_from_pdf_page(pdf_path, 3)  # Assuming index is on Page 3
-    sections = {}
-    
-    matches = re.findall(r'(\d+)\.\s*(.+?)\s+(\d+)', index_text)  # Matches "1. Section Title 03"
-    
-    for match in matches:
-        section_number, section_title, page_number = match
-        sections[int(page_number)] = section_title.strip()
-    
-    print(f"✅ Found {len(sections)} indexed sections.")
-    return sections
+def extract_indexed_sections(source):
+    """Builds the section index from the PDF outline, or else from a table-of-contents page."""
+    logger.debug("📑 Extracting index sections...")
+    index = SectionIndex.build(source)
+    logger.info("✅ Found %d indexed sections (from %s).", len(index), index.source)
+    return index
 
-def process_page(pdf_path, page_number):
+def process_page(source, page_number, raster_cache=None, render_profile=None):
     """Processes a single page: extracts text and detects charts."""
-    print(f"\n📄 Processing Page {page_number}...")
+    logger.debug("📄 Processing Page %d...", page_number)
+    raster_cache = raster_cache if raster_cache is not None else RasterCache()
 
     # Extract text from PDF using OCR if needed
-    page_text = extract_text_from_pdf_page(pdf_path, page_number)
+    page_text = extract_text_from_pdf_page(source, page_number, raster_cache, render_profile)
 
-    # Initialize ChartExtractor
-    chart_extractor = ChartExtractor(pdf_path)
+    # Initialize ChartExtractor (sharing the page render with the OCR step)
+    chart_extractor = ChartExtractor(source.pdf_path, raster_cache=raster_cache, render_profile=render_profile)
     charts_data = chart_extractor.extract_charts_from_page(page_number)
+    raster_cache.discard_page(source.pdf_path, page_number)
 
     # Combine extracted text and chart data
     if charts_data and isinstance(charts_data, dict):
@@ -99,55 +89,78 @@ def process_page(pdf_path, page_number):
             page_text += f"\nExtracted Numerical Data:\n{charts_data['chart_numbers']}\n"
 
     if not page_text.strip():
-        print(f"\n🚫 No meaningful text extracted from page {page_number}. Skipping...")
+        logger.info("🚫 No meaningful text extracted from page %d. Skipping...", page_number)
         return None
 
     return f"\n=== Page {page_number} ===\n{page_text}"
 
-def generate_summary(text_file):
+def _page_context(pdf_path, render_profile):
+    """Builds the reader and raster cache each process-mode worker keeps for itself."""
+    return PageSource(pdf_path), RasterCache(), render_profile
+
+def _page_task(context, page_number):
+    source, raster_cache, render_profile = context
+    return page_number, process_page(source, page_number, raster_cache, render_profile)
+
+def generate_summary(text_file, indexed_sections=None, summary_mode=LLM_MODE):
     """Summarizes the extracted text file using Ollama API with structured sections."""
-    print("\n⏳ Generating structured summary...")
+    logger.info("⏳ Generating structured summary...")
 
     with open(text_file, "r", encoding="utf-8") as f:
         extracted_content = f.read()
 
-    generator = SummaryGenerator(extracted_content)
-    final_summary = generator.generate_summary()
+    # Feed page by page (split on the "=== Page N ===" markers) so chunks can break at section starts.
+    generator = SummaryGenerator(extracted_content, sections=indexed_sections, mode=summary_mode)
+    parts = re.split(r"^=== Page (\d+) ===$", extracted_content, flags=re.MULTILINE)
+    for page_number, page_text in zip(parts[1::2], parts[2::2]):
+        generator.feed(page_text, int(page_number))
+    final_summary = generator.finish()
 
-    print("\n✅ Summary generated successfully.\n")
+    logger.info("✅ Summary generated successfully.")
     return final_summary
 
 def main():
     parser = argparse.ArgumentParser(description="Extract and summarize PDF content using Ollama API.")
     parser.add_argument("--mode", choices=["api", "cli"], required=True, help="Choose API or CLI mode")
+    parser.add_argument("--execution-mode", choices=EXECUTION_MODES, default=THREAD_MODE,
+                        help="Run pages on a thread pool or on a process pool sized to the machine")
+    parser.add_argument("--workers", type=int, default=None, help="Override the number of page workers")
+    parser.add_argument("--layout-dpi", type=int, default=LAYOUT_DPI, help="Grayscale DPI used to find figures")
+    parser.add_argument("--ocr-dpi", type=int, default=OCR_DPI, help="DPI used for regions and pages that need OCR")
+    parser.add_argument("--summary-mode", choices=SUMMARY_MODES, default=LLM_MODE,
+                        help="'fast' builds an extractive summary in seconds without calling the model")
+    parser.add_argument("--log-level", default=LOG_LEVEL, help="DEBUG, INFO, WARNING, ERROR or CRITICAL")
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
     pdf_path = "Infographics English.pdf"
 
     start_time = time.time()
-    indexed_sections = extract_indexed_sections(pdf_path)
-    extracted_texts = {}
-
-    # Extract text from all pages in parallel (ensuring ordered sequence)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = {executor.submit(process_page, pdf_path, page): page for page in range(1, len(PyPDF2.PdfReader(open(pdf_path, 'rb')).pages) + 1)}
-        for future in concurrent.futures.as_completed(futures):
-            page = futures[future]  # Get corresponding page number
-            page_text = future.result()
+    source = PageSource(pdf_path)  # Parse the PDF once, share it across all pages
+    raster_cache = RasterCache()  # Render each page once for both OCR and chart extraction
+    render_profile = RenderProfile(args.layout_dpi, args.ocr_dpi)
+    indexed_sections = extract_indexed_sections(source)
+
+    # Extract text from all pages in parallel; results arrive in page order and go straight to a **timestamped file**
+    workers = args.workers or (MAX_WORKERS if args.execution_mode == THREAD_MODE else None)
+    executor = PageExecutor(args.execution_mode, workers)
+    extracted_text_file = get_timestamped_filename()
+    with source, open(extracted_text_file, "w", encoding="utf-8") as f:
+        first = True
+        for page, page_text in executor.map_pages(_page_task, source.num_pages, context=(source, raster_cache, render_profile),
+                                                  context_factory=_page_context,
+                                                  factory_args=(pdf_path, render_profile)):
             if page_text:
-                extracted_texts[page] = page_text  # Store in dict to preserve order
+                if not first:
+                    f.write("\n")
+                f.write(page_text)
+                first = False
 
-    # Sort extracted text by page order
-    sorted_text = "\n".join([extracted_texts[p] for p in sorted(extracted_texts.keys())])
-
-    # ✅ Save extracted text to a **timestamped file**
-    extracted_text_file = get_timestamped_filename()
-    with open(extracted_text_file, "w", encoding="utf-8") as f:
-        f.write(sorted_text)
+    raster_cache.close()
 
-    print(f"\n📜 Extracted text saved to {extracted_text_file}.")
+    logger.info("📜 Extracted text saved to %s.", extracted_text_file)
 
     # ✅ **Generate Summary using the newly saved extracted text file**
-    final_summary = generate_summary(extracted_text_file)
+    final_summary = generate_summary(extracted_text_file, indexed_sections, args.summary_mode)
 
     print(f"\n======= Broad Summary =======\n")
     print(final_summary)  # 🔥 Ensure Summary Appears on Command Line!
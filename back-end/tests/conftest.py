@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the back-end's modules the way app.py does (`from utils.X import Y`), from any working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+import shutil
+import pytest
+from benchmarks.synthetic_pdf import write_pdf
+from pdf_processor import PDFProcessor
+from utils.metrics import STAGE_SECONDS, Trace
+from utils.page_executor import PROCESS_MODE
+from utils.SummaryGenerator import FAST_MODE
+
+pytestmark = pytest.mark.skipif(shutil.which("pdftoppm") is None, reason="needs poppler's pdftoppm")
+
+
+def test_process_mode_pages_reach_the_job_trace_and_metrics(tmp_path):
+    pdf_path = write_pdf(str(tmp_path / "text.pdf"), 6, "text")
+    page_count_before = STAGE_SECONDS._series.get(("page",), [None, 0.0, 0])[2]
+    trace = Trace("job")
+
+    result = PDFProcessor(pdf_path, execution_mode=PROCESS_MODE, max_workers=2, use_summary_cache=False,
+                          summary_mode=FAST_MODE, trace=trace).process_pdf()
+
+    assert result["stage_totals"]["page"]["count"] == 6
+    assert "rasterize" in result["stage_totals"]
+    assert sorted(span["page"] for span in trace.spans if span["stage"] == "page") == list(range(1, 7))
+    assert STAGE_SECONDS._series[("page",)][2] == page_count_before + 6
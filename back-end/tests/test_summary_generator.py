@@ -0,0 +1,34 @@
+import threading
+import time
+from utils.SummaryGenerator import SummaryGenerator
+from utils.disk_cache import DiskCache
+
+
+class SlowClient:
+    """Fake Ollama client that takes `delay` seconds per generation."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_stream(self, model, prompt, max_tokens=None, options=None):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+        yield "Summary."
+
+
+def test_feed_caps_pending_chunk_summaries(tmp_path):
+    generator = SummaryGenerator(client=SlowClient(0.05), concurrency=2, token_budget=256, overlap_tokens=0,
+                                 memo_cache=DiskCache(str(tmp_path), 2**20, 3600), use_memo=False)
+    page = " ".join(f"Sentence number {i} of a page that fills most of one chunk." for i in range(60))
+
+    most_pending = 0
+    for page_number in range(1, 11):
+        generator.feed(page, page_number)
+        most_pending = max(most_pending, generator.pending_chunks())
+
+    assert most_pending <= generator.max_pending == 4
+    assert generator.finish()
+    assert generator.client.calls > generator.max_pending  # Every chunk was still summarized
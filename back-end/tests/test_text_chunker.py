@@ -0,0 +1,22 @@
+from utils.text_chunker import TextChunker
+
+
+def test_short_section_keeps_its_title_when_it_shares_a_chunk():
+    chunker = TextChunker(200, overlap_tokens=0, sections={1: "Preface", 2: "Methods"})
+
+    assert chunker.add_page("A short preface.", 1) == []
+    assert chunker.add_page("The methods section starts here.", 2) == []  # Preface is under MIN_FILL
+    chunk, = chunker.flush()
+
+    assert chunk.section == "Preface / Methods"
+    assert chunk.text.startswith("A short preface.")
+
+
+def test_chunks_after_a_full_section_carry_only_the_new_title():
+    chunker = TextChunker(200, overlap_tokens=0, sections={1: "Preface", 2: "Methods"})
+    chunker.add_page(" ".join(["A long preface sentence that fills the chunk."] * 10), 1)
+
+    closed = chunker.add_page("The methods section starts here.", 2)
+
+    assert [chunk.section for chunk in closed] == ["Preface"]
+    assert [chunk.section for chunk in chunker.flush()] == ["Methods"]
@@ -1,13 +1,104 @@
+import logging
 import cv2
-import pytesseract
 import numpy as np
-from pdf2image import convert_from_path
+from utils.raster_cache import RasterCache, RenderProfile, render_region
+from utils.ocr_backend import get_ocr_backend
+from utils.metrics import span
+
+# Figure region detection thresholds (fractions are relative to the page or the region)
+MIN_REGION_AREA = 0.01  # Ignore boxes smaller than 1% of the page
+MAX_REGION_AREA = 0.95  # A box covering the whole page is the page border, not a figure
+MIN_LINE_DENSITY = 0.02  # Share of the box covered by long horizontal/vertical strokes (axes, grids, bars)
+MIN_FILL_RATIO = 0.35  # Share of the box covered by ink (solid bars, pie slices, filled areas)
+MERGE_KERNEL_INCHES = 0.125  # Dilation (1/8") that merges a figure's marks and labels into one blob
+OCR_CONFIG = r'--oem 3 --psm 6'  # Optimized OCR settings
+
+logger = logging.getLogger(__name__)
 
 class ChartExtractor:
     """Class to extract and structure text from chart images in PDF pages."""
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, raster_cache=None, render_profile=None):
         self.pdf_path = pdf_path
+        self.raster_cache = raster_cache if raster_cache is not None else RasterCache()
+        self.render_profile = render_profile if render_profile is not None else RenderProfile()
+        self.dpi = self.render_profile.layout_dpi  # Resolution figure detection runs at
+
+    def render_page(self, page_number):
+        """Returns the low-DPI grayscale layout render through the shared raster cache."""
+        image = self.raster_cache.get(self.pdf_path, page_number, dpi=self.dpi, grayscale=self.render_profile.grayscale)
+        return [image] if image is not None else []
+
+    def render_region_for_ocr(self, page_number, bbox):
+        """Returns a figure region (bbox in points) at OCR resolution.
+
+        Crops it from a full-page OCR-DPI render when the text stage already made
+        one; otherwise asks pdftoppm to rasterize just that region.
+        """
+        profile = self.render_profile
+        page = self.raster_cache.peek(self.pdf_path, page_number, dpi=profile.ocr_dpi, grayscale=profile.grayscale)
+        if page is None:
+            return render_region(self.pdf_path, page_number, bbox, profile.ocr_dpi, profile.grayscale)
+        scale = profile.ocr_dpi / 72.0
+        x, y, w, h = (int(round(value * scale)) for value in bbox)
+        return page.crop((x, y, x + w, y + h))
+
+    def to_gray(self, image):
+        """Returns a single-channel uint8 array for a PIL image or an RGB array."""
+        array = np.asarray(image)
+        return array if array.ndim == 2 else cv2.cvtColor(array, cv2.COLOR_RGB2GRAY)
+
+    def detect_figure_regions(self, gray):
+        """Finds candidate chart/figure boxes (x, y, w, h in pixels) on a grayscale page.
+
+        Ink is merged into blobs with a wide dilation; a blob is kept as a figure
+        when it contains enough long horizontal/vertical strokes (axes, grid
+        lines, bars) or enough solid fill. Plain text blocks have neither, so
+        text-only pages yield no regions and skip OCR entirely.
+        """
+        _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        height, width = ink.shape
+        page_area = float(height * width)
+
+        horizontal = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(1, width // 30), 1)))
+        vertical = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(1, height // 30))))
+        lines = cv2.bitwise_or(horizontal, vertical)
+
+        kernel = max(3, int(round(MERGE_KERNEL_INCHES * self.dpi)))
+        merged = cv2.dilate(ink, cv2.getStructuringElement(cv2.MORPH_RECT, (kernel, kernel)))
+        contours, _ = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            area = float(w * h)
+            if not MIN_REGION_AREA <= area / page_area <= MAX_REGION_AREA:
+                continue
+            fill_ratio = cv2.countNonZero(ink[y:y + h, x:x + w]) / area
+            line_density = cv2.countNonZero(lines[y:y + h, x:x + w]) / area
+            if line_density >= MIN_LINE_DENSITY or fill_ratio >= MIN_FILL_RATIO:
+                regions.append((x, y, w, h))
+        return sorted(regions, key=lambda box: (box[1], box[0]))
+
+    def to_points(self, box):
+        """Converts a pixel box at the render DPI into PDF points (1/72 inch)."""
+        scale = 72.0 / self.dpi
+        return [round(value * scale, 1) for value in box]
+
+    def ocr_regions(self, page_number, image):
+        """Returns (bbox in points, OCR text) for every figure region on a page, in one OCR batch.
+
+        Regions are found on the low-DPI layout render, then re-rendered at the
+        profile's OCR DPI before thresholding and OCR.
+        """
+        boxes = [self.to_points(box) for box in self.detect_figure_regions(self.to_gray(image))]
+        crops = []
+        for bbox in boxes:
+            region = self.to_gray(self.render_region_for_ocr(page_number, bbox))
+            _, crop = cv2.threshold(region, 150, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            crops.append(crop)
+        texts = get_ocr_backend().image_to_string_batch(crops, config=OCR_CONFIG) if crops else []
+        return [(bbox, text.strip()) for bbox, text in zip(boxes, texts)]
 
     def preprocess_image(self, image):
         """Convert to grayscale and apply thresholding to enhance text detection."""
@@ -17,24 +108,20 @@ class ChartExtractor:
 
     def extract_text_from_image(self, image):
         """Use OCR to extract text from the preprocessed image."""
-        custom_config = r'--oem 3 --psm 6'  # Optimized OCR settings
-        text = pytesseract.image_to_string(image, config=custom_config)
+        text = get_ocr_backend().image_to_string(image, config=OCR_CONFIG)
         return text.strip()
 
     def detect_charts_and_extract_text(self, page_number):
         """Extracts charts from a page and retrieves structured data."""
-        print(f"🔍 Processing charts on page {page_number}...")
+        logger.debug("🔍 Processing charts on page %d...", page_number)
 
-        images = convert_from_path(self.pdf_path, first_page=page_number, last_page=page_number)
+        images = self.render_page(page_number)
         extracted_data = {}
 
-        for index, image in enumerate(images):
-            open_cv_image = np.array(image)
-            open_cv_image = open_cv_image[:, :, ::-1].copy()  # Convert RGB to BGR (for OpenCV)
-
-            text_data = self.extract_text_from_image(open_cv_image)
-            cleaned_text = self.clean_extracted_chart_text(text_data)
-            extracted_data[f"Chart_{index+1}"] = cleaned_text
+        for image in images:
+            for bbox, text_data in self.ocr_regions(page_number, image):
+                cleaned_text = self.clean_extracted_chart_text(text_data)
+                extracted_data[f"Chart_{len(extracted_data) + 1}"] = cleaned_text
         
         return extracted_data
 
@@ -60,16 +147,22 @@ class ChartExtractor:
         return all_chart_data
     
     def extract_charts_from_page(self, page_number):
-        """Extract chart-like data from a given page number."""
-        images = convert_from_path(self.pdf_path, first_page=page_number, last_page=page_number)
-        extracted_data = []
+        """Extract chart-like data from the figure regions of a given page.
+
+        Returns one dict per detected region: its `bbox` ([x, y, w, h] in PDF
+        points from the top-left corner) and the numbers OCR found in it.
+        """
+        with span("charts", page=page_number) as record:
+            images = self.render_page(page_number)
+            extracted_data = []
 
-        for img in images:
-            processed_img = self.preprocess_image(np.array(img))
-            text_data = self.extract_text_from_image(processed_img)
-            structured_data = self.parse_chart_data(text_data)
-            extracted_data.append(structured_data)
+            for img in images:
+                for bbox, text_data in self.ocr_regions(page_number, img):
+                    structured_data = self.parse_chart_data(text_data)
+                    structured_data["bbox"] = bbox
+                    extracted_data.append(structured_data)
 
+            record.attributes["charts"] = len(extracted_data)
         return extracted_data
 
     def extract_numerical_values(self, text):
@@ -1,46 +1,201 @@
-import requests
+import os
 import re
-import nltk
-from collections import Counter
-from nltk.tokenize import sent_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
+import logging
+import asyncio
+import threading
+import unicodedata
+import concurrent.futures
+from collections import Counter, deque
+from utils import progress_events
+from utils.disk_cache import DiskCache
+from utils.extractive_summarizer import ExtractiveSummarizer, select_salient
+from utils.section_index import SectionIndex, SectionMatcher
+from utils.topic_extractor import TopicExtractor
+from utils.progress_events import ProgressPublisher
+from utils.metrics import current_trace, use_trace
+from utils.ollama_client import OLLAMA_API_URL, OLLAMA_CONCURRENCY, get_ollama_client
+from utils.text_chunker import (MODEL_CONTEXT_TOKENS, DEFAULT_CONTEXT_TOKENS, OVERLAP_TOKENS, TextChunker,
+                                chunk_token_budget, estimate_tokens, split_sentences)
 
-# Download NLTK tokenization model
-nltk.download('punkt')
-
-OLLAMA_API_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "deepseek-r1:1.5b"
-CHUNK_SIZE = 10000
+REDUCE_FAN_IN = 4  # Chunk summaries merged per reduce call; levels repeat until one summary is left
+PENDING_CHUNKS_PER_WORKER = 2  # Unfinished chunk summaries allowed per model slot before `feed` waits
+THINK_OPEN, THINK_CLOSE = "<think>", "</think>"
+LLM_MODE = "llm"  # Map-reduce through Ollama
+FAST_MODE = "fast"  # Extractive, per-section TextRank; never calls the model
+SUMMARY_MODES = (LLM_MODE, FAST_MODE)
+# In LLM mode, pack chunks 1/ratio larger and keep only their most salient sentences (0 disables)
+PREFILTER_RATIO = float(os.environ.get("SUMMARY_PREFILTER_RATIO", 0))
+DEFAULT_SECTION = "General Overview"
+SUMMARY_CACHE_DIR = os.environ.get("SUMMARY_CACHE_DIR", "summary_cache")
+SUMMARY_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Chunk summaries are small; this holds tens of thousands
+SUMMARY_CACHE_MAX_AGE = 90 * 24 * 3600  # Drop summaries unused for 90 days
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROMPT = """
+        Generate a **detailed summary** of this section{section}.
+
+        **Summary Requirements:**
+        - Maintain all key insights from the text.
+        - Use **bullet points** and **headings** for readability.
+        - Ensure the summary is **complete and well-structured**.
+
+        **Section Content:**  
+        {text}
+
+        **Return only the structured summary.**
+        """
+
+MERGE_PROMPT = """
+        Merge these partial summaries of consecutive parts of one document into a single **structured summary**.
+
+        **Merge Requirements:**
+        - Keep every key insight and number; remove repetition.
+        - Preserve the document order and use **bullet points** and **headings**.
+
+        **Partial Summaries:**  
+        {text}
+
+        **Return only the merged summary.**
+        """
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """Returns the process-wide memo cache of LLM summaries."""
+    global _summary_cache
+    with _summary_cache_lock:
+        if _summary_cache is None:
+            _summary_cache = DiskCache(SUMMARY_CACHE_DIR, SUMMARY_CACHE_MAX_BYTES, SUMMARY_CACHE_MAX_AGE)
+        return _summary_cache
+
+
+def normalize_for_memo(text):
+    """Canonical form of prompt input for memo keys: Unicode NFKC with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+class ThinkFilter:
+    """Incremental `<think>...</think>` stripper for streamed model output.
+
+    `feed()` returns only the visible text of each fragment. A tag split
+    across fragments is held back until it can be recognised, and leading
+    whitespace before the first visible character is dropped, matching what
+    `clean_summary` does to a complete response.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._thinking = False
+        self._started = False
+
+    def feed(self, text):
+        self._buffer += text
+        visible = []
+        while True:
+            tag = THINK_CLOSE if self._thinking else THINK_OPEN
+            position = self._buffer.find(tag)
+            if position >= 0:
+                if not self._thinking:
+                    visible.append(self._buffer[:position])
+                self._buffer = self._buffer[position + len(tag):]
+                self._thinking = not self._thinking
+                continue
+            # Keep any suffix that could be the start of the tag we are looking for.
+            keep = next((n for n in range(min(len(tag) - 1, len(self._buffer)), 0, -1)
+                         if tag.startswith(self._buffer[-n:])), 0)
+            if not self._thinking:
+                visible.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:]
+            return self._emit("".join(visible))
+
+    def flush(self):
+        """Returns held-back visible text at the end of the stream (an unclosed think block is dropped)."""
+        rest = "" if self._thinking else self._buffer
+        self._buffer = ""
+        return self._emit(rest)
+
+    def _emit(self, text):
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
 
 class SummaryGenerator:
-    def __init__(self, extracted_text):
-        """Initialize the summary generator with extracted text."""
+    def __init__(self, extracted_text="", events=None, client=None, concurrency=OLLAMA_CONCURRENCY,
+                 reduce_fan_in=REDUCE_FAN_IN, model=MODEL_NAME, sections=None, token_budget=None,
+                 overlap_tokens=OVERLAP_TOKENS, memo_cache=None, use_memo=True, mode=LLM_MODE,
+                 prefilter_ratio=PREFILTER_RATIO, spool=None, trace=None):
+        """Initialize the summary generator with extracted text (or feed it later, page by page).
+
+        `sections` (a SectionIndex, or {start page: title}) marks where chunks should break; the
+        per-chunk `token_budget` defaults to what fits the model's context window.
+        With `use_memo=False` cached summaries are ignored (fresh ones are still stored).
+        `mode=FAST_MODE` builds an extractive summary per section without the LLM.
+        With a `spool` (TextSpool), text waiting to be summarized is kept on disk, not in memory.
+        Model calls made by worker threads are recorded in `trace` (default: the caller's current trace).
+        """
+        if mode not in SUMMARY_MODES:
+            raise ValueError(f"Unknown summary mode {mode!r}; expected one of {SUMMARY_MODES}")
         self.text = extracted_text
+        self.model = model
+        self.context_tokens = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+        self.token_budget = token_budget or chunk_token_budget(model)
+        self.overlap_tokens = overlap_tokens
+        self.section_index = sections if isinstance(sections, SectionIndex) else SectionIndex.from_dict(sections or {})
+        self.sections = self.section_index.as_dict()
+        self.mode = mode
+        self.prefilter_ratio = prefilter_ratio if 0 < prefilter_ratio < 1 else None
+        chunk_budget = int(self.token_budget / self.prefilter_ratio) if self.prefilter_ratio else self.token_budget
+        self.chunker = TextChunker(chunk_budget, overlap_tokens, self.sections)
+        self.spool = spool
+        self.trace = trace if trace is not None else current_trace()
+        self._section_texts = []  # Fast mode: [title, [page texts or spool spans]] per section, in order
+        self._section_words = Counter()  # Words fed per section title, for proportional allocation
+        self.events = events  # Optional ProgressPublisher notified as chunks finish
+        self.client = client if client is not None else get_ollama_client(OLLAMA_API_URL)
+        self.concurrency = concurrency
+        self.reduce_fan_in = max(2, reduce_fan_in)
+        self.memo_cache = memo_cache if memo_cache is not None else get_summary_cache()
+        self.use_memo = use_memo
+        self.memo_hits = 0
+        self.memo_misses = 0
         self.section_titles = self.extract_section_titles()
+        self.section_matcher = SectionMatcher(self.section_titles.values())  # For text fed without page numbers
+        self._chunk_futures = []
+        self._pending = deque()  # Chunk futures not yet seen finished, oldest first
+        self.max_pending = PENDING_CHUNKS_PER_WORKER * max(1, concurrency)
+        self._executor = None
+        self._token_listeners = []
+        self.summary = None
     
+    def set_sections(self, section_index):
+        """Switches to a section index found mid-stream (e.g. an OCR'd TOC page); applies to pages fed from now on."""
+        self.section_index = section_index
+        self.sections = self.chunker.sections = section_index.as_dict()
+        self.section_titles = self.extract_section_titles()
+        self.section_matcher = SectionMatcher(self.section_titles.values())
+
     def extract_section_titles(self):
-        """Extracts section titles from the 'CONTENTS' page."""
-        section_pattern = r'(\d+)\.\s*(.+?)\s+(\d+)'
-        matches = re.findall(section_pattern, self.text)
-        return {int(match[2]): match[1].strip() for match in matches}
+        """Returns section titles by start page from the document's section index (no text rescan)."""
+        return self.section_index.as_dict()
     
-    def chunk_text(self, text, chunk_size=CHUNK_SIZE):
-        """Splits text into smaller chunks for processing."""
-        words = text.split()
-        return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+    def chunk_text(self, text):
+        """Splits text into sentence-aligned chunks that fit the model's token budget."""
+        return [chunk.text for chunk in TextChunker(self.token_budget, self.overlap_tokens).chunk_text(text)]
 
     
     def allocate_summary_proportionally(self):
-        """Determines space allocation based on section coverage in extracted text."""
-        section_word_count = {title: 0 for title in self.section_titles.values()}
-        current_section = None
+        """Determines space allocation from the words fed into each indexed section.
 
-        for line in self.text.split("\n"):
-            for title in self.section_titles.values():
-                if title.lower() in line.lower():
-                    current_section = title  # Track current section
-            if current_section:
-                section_word_count[current_section] += len(line.split())
+        Pages fed with a page number count towards the section whose range holds
+        them; other text is attributed in one pass by spotting section titles.
+        """
+        if not self._section_words and self.text:
+            self.section_matcher.count_words(self.text, self._section_words)
+        section_word_count = {title: self._section_words[title] for title in self.section_titles.values()}
 
         # Normalize proportions
         total_words = sum(section_word_count.values())
@@ -83,9 +238,7 @@ class SummaryGenerator:
         Return only the structured summary.
         """
 
-        response = requests.post(OLLAMA_API_URL, json={"model": MODEL_NAME,"prompt": prompt,"stream": False,"max_tokens": 2048 }).json()
-
-        raw_summary = response.get("response", "⚠️ No summary generated.").strip()
+        raw_summary = self.client.generate(self.model, prompt, max_tokens=2048).strip() or "⚠️ No summary generated."
 
         return self.clean_summary(raw_summary)
 
@@ -124,40 +277,218 @@ class SummaryGenerator:
         
         return summary
 
-    def generate_summary(self):
-        """Generates structured summary covering all sections proportionally."""
-        text_chunks = self.chunk_text(self.text)
-        chunk_summaries = []
-
-        for i, chunk in enumerate(text_chunks):
-            print(f"⏳ Processing Chunk {i+1}/{len(text_chunks)}...")
-
-            prompt = f"""
-            Generate a **detailed summary** of this section.
-
-            **Summary Requirements:**
-            - Maintain all key insights from the text.
-            - Use **bullet points** and **headings** for readability.
-            - Ensure the summary is **complete and well-structured**.
-
-            **Section Content:**  
-            {chunk}
+    def summarize_chunk(self, chunk, index, section=None):
+        """Summarizes one chunk of text through the Ollama API."""
+        logger.debug("⏳ Processing Chunk %d...", index)
+
+        summary = self.memoized_generation(CHUNK_PROMPT, chunk, f' ("{section}")' if section else "",
+                                           "chunk", 0, index).strip() or "⚠️ No summary generated."
+        if self.events is not None:
+            self.events.publish(progress_events.CHUNK_SUMMARIZED, chunk=index)
+        # Drop the reasoning block here so it never reaches the reduce prompts.
+        return self.clean_summary(summary)
+
+    def merge_summaries(self, summaries, level=1, index=1):
+        """Reduce step: merges several partial summaries into one through the Ollama API."""
+        sections = "\n\n---\n\n".join(summaries)
+        merged = self.memoized_generation(MERGE_PROMPT, sections, "", "reduce", level, index)
+        return self.clean_summary(merged) or sections
+
+    def memoized_generation(self, template, text, section, stage, level, index):
+        """Fills a prompt template and generates it, serving repeats from the memo cache.
+
+        The key covers the normalized input text, the section label, the
+        template itself and the model settings, so editing a prompt or
+        switching models never serves a stale summary. A hit is published as a
+        single token event so streaming clients still see it.
+        """
+        key = DiskCache.make_key(normalize_for_memo(text), section, template, self.model, self.context_tokens)
+        if self.use_memo:
+            cached = self.memo_cache.get(key)
+            if cached is not None:
+                self.memo_hits += 1
+                self._publish_token(stage, level, index, self.clean_summary(cached["response"]), done=True)
+                return cached["response"]
+        self.memo_misses += 1
+        response = self.stream_generation(template.format(section=section, text=text), stage, level, index)
+        if response.strip():
+            self.memo_cache.put(key, {"response": response})
+        return response
+
+    def stream_generation(self, prompt, stage, level, index):
+        """Runs one streamed generation and returns the raw text.
+
+        Visible fragments (reasoning stripped) are published as SUMMARY_TOKEN
+        events while the model produces them.
+        """
+        think = ThinkFilter()
+        parts = []
+        for fragment in self.client.generate_stream(self.model, prompt, max_tokens=8192,
+                                                    options={"num_ctx": self.context_tokens}):
+            parts.append(fragment)
+            self._publish_token(stage, level, index, think.feed(fragment))
+        self._publish_token(stage, level, index, think.flush(), done=True)
+        return "".join(parts)
+
+    def _publish_token(self, stage, level, index, text, done=False):
+        """Publishes a visible fragment; `done` marks the last one of its stream (it may be empty)."""
+        if not text and not done:
+            return
+        for publisher in [self.events, *self._token_listeners]:
+            if publisher is not None:
+                publisher.publish(progress_events.SUMMARY_TOKEN, stage=stage, level=level, chunk=index, text=text,
+                                  done=done)
+
+    def group_for_reduce(self, summaries):
+        """Groups consecutive summaries, up to `reduce_fan_in` per group, without exceeding the token budget."""
+        groups, group, tokens = [], [], 0
+        for summary in summaries:
+            summary_tokens = estimate_tokens(summary)
+            if group and (len(group) == self.reduce_fan_in or tokens + summary_tokens > self.token_budget):
+                groups.append(group)
+                group, tokens = [], 0
+            group.append(summary)
+            tokens += summary_tokens
+        if group:
+            groups.append(group)
+        return groups
+
+    def reduce_summaries(self, summaries):
+        """Merges chunk summaries level by level, `reduce_fan_in` at a time, until one is left.
+
+        Every group within a level is merged concurrently, so a document with N
+        chunks needs about log(N) sequential LLM round trips after the map stage
+        instead of one prompt holding every summary. If no two summaries fit one
+        prompt anymore, the rest are concatenated rather than truncated.
+        """
+        executor = self._get_executor()
+        level = 0
+        while len(summaries) > 1:
+            groups = self.group_for_reduce(summaries)
+            if len(groups) == len(summaries):
+                return "\n\n".join(summaries)
+            level += 1
+            summaries = list(executor.map(
+                lambda numbered: numbered[1][0] if len(numbered[1]) == 1
+                else self._merge_traced(numbered[1], level, numbered[0]), enumerate(groups, 1)))
+        return summaries[0] if summaries else ""
+
+    def feed(self, text, page_number=None):
+        """Adds one streamed page; every full chunk is summarized in the background while more text arrives.
+
+        Once `max_pending` chunk summaries are unfinished, this blocks until the oldest one is done, so
+        a model that falls behind slows page extraction down instead of letting chunk text pile up.
+        """
+        section = self.section_index.section_for_page(page_number) if page_number is not None else None
+        if section is not None:
+            self._section_words[section.title] += len(text.split())
+        elif page_number is None:
+            self.section_matcher.count_words(text, self._section_words)
+        if self.mode == FAST_MODE:
+            if page_number in self.sections or not self._section_texts:
+                self._section_texts.append([self.sections.get(page_number, DEFAULT_SECTION), []])
+            self._section_texts[-1][1].append(self.spool.append(text) if self.spool is not None else text)
+            return
+        for chunk in self.chunker.add_page(text, page_number):
+            self._submit_chunk(chunk)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # The shared client's semaphore is the real limit across jobs; this only bounds our own threads.
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        return self._executor
+
+    def pending_chunks(self):
+        """Returns how many submitted chunk summaries are still unfinished."""
+        while self._pending and self._pending[0].done():
+            self._pending.popleft()
+        return sum(not future.done() for future in self._pending)
+
+    def _submit_chunk(self, chunk):
+        while self.pending_chunks() >= self.max_pending:
+            concurrent.futures.wait([self._pending.popleft()])
+        index = len(self._chunk_futures) + 1
+        # Spooled, only the spans of the (at most `max_pending`) waiting chunks stay in memory.
+        text = self.spool.append(chunk.text) if self.spool is not None else chunk.text
+        future = self._get_executor().submit(self._summarize_queued, text, index, chunk.section)
+        self._chunk_futures.append(future)
+        self._pending.append(future)
+
+    def _summarize_queued(self, text, index, section):
+        with use_trace(self.trace):
+            text = self._load(text)
+            if self.prefilter_ratio:
+                text = select_salient(text, self.token_budget)
+            return self.summarize_chunk(text, index, section)
+
+    def _merge_traced(self, summaries, level, index):
+        with use_trace(self.trace):
+            return self.merge_summaries(summaries, level, index)
+
+    def _load(self, text):
+        """Returns fed text, decoding it from the spool's memory map if it was spilled there."""
+        return self.spool.text(text) if isinstance(text, tuple) else text
+
+    def extractive_summary(self):
+        """Fast mode: the most central sentences of each section, with no model call."""
+        summary = ExtractiveSummarizer().summarize(
+            (title, "\n\n".join(self._load(text) for text in texts)) for title, texts in self._section_texts)
+        self._section_texts = []
+        self._publish_token("extractive", 0, 1, summary, done=True)
+        return summary
 
-            **Return only the structured summary.**
-            """
+    def finish(self):
+        """Summarizes any remaining fed text (map) and reduces the chunk summaries to one (reduce)."""
+        if self.mode == FAST_MODE:
+            self.summary = self.extractive_summary()
+            return self.summary
+        for chunk in self.chunker.flush():
+            self._submit_chunk(chunk)
+        try:
+            chunk_summaries = [future.result() for future in self._chunk_futures]
+            # 🔹 Merge chunk summaries
+            final_summary = self.reduce_summaries(chunk_summaries)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._chunk_futures = []
+            self._pending.clear()
+        if self.memo_hits:
+            logger.info("♻️ Reused %d of %d summaries from the memo cache.", self.memo_hits,
+                        self.memo_hits + self.memo_misses)
+        self.summary = self.clean_summary(final_summary)
+        return self.summary
 
-            response = requests.post(OLLAMA_API_URL, json={
-                "model": MODEL_NAME,
-                "prompt": prompt,
-                "stream": False,
-                "max_tokens": 8192
-            }).json()
+    def generate_summary(self):
+        """Generates structured summary covering all sections proportionally."""
+        self.feed(self.text)
+        return self.finish()
 
-            chunk_summaries.append(response.get("response", "⚠️ No summary generated.").strip())
+    async def stream_summary(self):
+        """Async iterator over SUMMARY_TOKEN events while `generate_summary` runs in a worker thread.
 
-        # 🔹 Merge chunk summaries
-        final_summary = "\n\n".join(chunk_summaries)
-        return self.clean_summary(final_summary)
+        Chunk summaries stream first (stage "chunk"), then each reduce level
+        (stage "reduce"); the final cleaned summary is left in `self.summary`.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        publisher = ProgressPublisher(queue, loop)
+        self._token_listeners.append(publisher)
+
+        def run():
+            try:
+                return self.generate_summary()
+            finally:
+                publisher.close()
+
+        task = loop.run_in_executor(None, run)
+        try:
+            while (event := await queue.get()) is not None:
+                yield event
+            await task
+        finally:
+            self._token_listeners.remove(publisher)
     
     def clean_summary(self, summary):
         """Removes AI-generated messages and unnecessary filler text."""
@@ -166,17 +497,11 @@ class SummaryGenerator:
         return summary
 
     def extract_key_topics(self, top_n=5):
-        """Extracts key topics dynamically using TF-IDF."""
-        sentences = sent_tokenize(self.text)
+        """Extracts key topics dynamically using hashed, sparse TF-IDF (see TopicExtractor)."""
+        sentences = split_sentences(self.text)
         if len(sentences) < 3:
             return ["General Overview"]
 
-        vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2))
-        X = vectorizer.fit_transform(sentences)
-
-        feature_array = vectorizer.get_feature_names_out()
-        tfidf_scores = X.toarray().sum(axis=0)
-        sorted_indices = tfidf_scores.argsort()[::-1]
-        top_terms = [feature_array[idx] for idx in sorted_indices[:top_n]]
-
-        return [term.title() for term in top_terms]
+        extractor = TopicExtractor(top_n=top_n)
+        extractor.add_sentences(sentences)
+        return [term.title() for term in extractor.top_terms()]
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class DiskCache:
+    """Persistent JSON cache stored as one file per key under `cache_dir`.
+
+    Entries are evicted by age (`max_age` seconds since last use) and, once
+    the directory exceeds `max_bytes`, least recently used first. A hit
+    refreshes the entry's mtime, which doubles as its last-used timestamp.
+    The directory is only rescanned when the tracked size passes the budget
+    or an hour has gone by, so stores stay cheap with many small entries.
+    """
+
+    SWEEP_INTERVAL = 3600  # Seconds between age sweeps when the size budget is not exceeded
+
+    def __init__(self, cache_dir, max_bytes, max_age):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._bytes = 0
+        self._last_sweep = 0
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def make_key(*parts):
+        """Builds a cache key by hashing every part together."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the stored value, or None on a miss or an expired entry."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+                if time.time() - stat.st_mtime > self.max_age:
+                    os.remove(path)
+                    self._bytes = max(0, self._bytes - stat.st_size)
+                    self.misses += 1
+                    return None
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores a JSON-serializable value atomically, then enforces the limits."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        size = os.path.getsize(tmp_path)
+        path = self._path(key)
+        with self._lock:
+            try:
+                self._bytes -= os.path.getsize(path)  # Overwriting a key replaces its bytes
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+            self._bytes += size
+            if self._bytes > self.max_bytes or time.time() - self._last_sweep > self.SWEEP_INTERVAL:
+                self._evict()
+
+    def stats(self):
+        """Returns hit/miss counters and the tracked size as a JSON-ready dict."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "bytes": self._bytes,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+
+    def _evict(self):
+        """Drops expired entries, then the least recently used ones until under budget (lock held)."""
+        now = self._last_sweep = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                os.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+        self._bytes = total
@@ -0,0 +1,105 @@
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.text_chunker import estimate_tokens, split_sentences
+
+DAMPING = 0.85  # TextRank/PageRank damping factor
+MAX_ITERATIONS = 50
+TOLERANCE = 1e-6
+MIN_SIMILARITY = 0.05  # Weaker sentence links are dropped to keep the similarity graph sparse
+MAX_TEXTRANK_SENTENCES = 3000  # Above this a section is scored by similarity to its centroid (linear time)
+MIN_SENTENCE_WORDS = 5  # Shorter fragments (headings, captions, numbers) are never picked
+SENTENCES_PER_SECTION = 5
+SUMMARY_RATIO = 0.05  # Share of a section's sentences kept, within [1, SENTENCES_PER_SECTION * 4]
+
+
+def score_sentences(sentences):
+    """Returns one salience score per sentence using sparse TF-IDF vectors.
+
+    Sentences are nodes of a cosine-similarity graph (TF-IDF rows are
+    L2-normalized, so X @ X.T is the cosine matrix) ranked with TextRank by
+    power iteration on the sparse, row-normalized graph. Very large sections
+    fall back to similarity with the section centroid. Nothing is densified.
+    """
+    if len(sentences) < 3:
+        return np.ones(len(sentences))
+    try:
+        X = TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform(sentences)
+    except ValueError:  # Only stop words / no vocabulary
+        return np.ones(len(sentences))
+
+    if len(sentences) > MAX_TEXTRANK_SENTENCES:
+        centroid = np.asarray(X.mean(axis=0)).ravel()
+        return X @ centroid
+
+    similarity = (X @ X.T).tocsr()
+    similarity.setdiag(0)
+    similarity.data[similarity.data < MIN_SIMILARITY] = 0
+    similarity.eliminate_zeros()
+
+    out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+    out_weight[out_weight == 0] = 1.0
+    transition = sp.diags(1.0 / out_weight) @ similarity  # Row-stochastic (isolated sentences keep zero rows)
+
+    n = len(sentences)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        updated = (1 - DAMPING) / n + DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def eligible(sentence):
+    return len(sentence.split()) >= MIN_SENTENCE_WORDS
+
+
+def top_sentences(sentences, count):
+    """Returns the `count` most salient sentences, in document order."""
+    scores = score_sentences(sentences)
+    ranked = [i for i in np.argsort(-scores, kind="stable") if eligible(sentences[i])]
+    return [sentences[i] for i in sorted(ranked[:count])]
+
+
+def select_salient(text, token_budget):
+    """Keeps the most salient sentences of `text` that fit in `token_budget`, in document order.
+
+    Used to shrink LLM prompts: text that already fits is returned unchanged.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    sentences = split_sentences(text)
+    scores = score_sentences(sentences)
+    keep, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        tokens = estimate_tokens(sentences[i]) + 1
+        if used + tokens <= token_budget:
+            keep.append(i)
+            used += tokens
+    return " ".join(sentences[i] for i in sorted(keep))
+
+
+class ExtractiveSummarizer:
+    """LLM-free summary: the most central sentences of every section, as Markdown bullets."""
+
+    def __init__(self, sentences_per_section=SENTENCES_PER_SECTION, ratio=SUMMARY_RATIO):
+        self.sentences_per_section = sentences_per_section
+        self.ratio = ratio
+
+    def sentence_count(self, available):
+        scaled = int(round(available * self.ratio))
+        return max(1, min(max(self.sentences_per_section, scaled), self.sentences_per_section * 4))
+
+    def summarize_section(self, text):
+        sentences = split_sentences(text)
+        return top_sentences(sentences, self.sentence_count(len(sentences)))
+
+    def summarize(self, sections):
+        """Summarizes [(title, text)] into '### title' headings with '- sentence' bullets."""
+        parts = []
+        for title, text in sections:
+            picked = self.summarize_section(text)
+            if picked:
+                parts.append(f"### {title}\n" + "\n".join(f"- {sentence}" for sentence in picked))
+        return "\n\n".join(parts)
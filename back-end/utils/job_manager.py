@@ -0,0 +1,205 @@
+import threading
+import time
+import uuid
+import concurrent.futures
+from collections.abc import MutableMapping
+from utils import progress_events
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETE = "complete"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class TTLDict(MutableMapping):
+    """Dict whose entries expire `ttl` seconds after they were last read or written."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _sweep(self, now):
+        expired = [key for key, (stamp, _) in self._data.items() if now - stamp > self.ttl]
+        for key in expired:
+            del self._data[key]
+
+    def __getitem__(self, key):
+        with self._lock:
+            now = time.time()
+            stamp, value = self._data[key]
+            if now - stamp > self.ttl:
+                del self._data[key]
+                raise KeyError(key)
+            self._data[key] = (now, value)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            now = time.time()
+            self._sweep(now)
+            self._data[key] = (now, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self):
+        with self._lock:
+            self._sweep(time.time())
+            return iter(list(self._data))
+
+    def __len__(self):
+        with self._lock:
+            self._sweep(time.time())
+            return len(self._data)
+
+
+class Job:
+    """One queued PDF processing job.
+
+    A job doubles as a progress publisher: pass it as `events=` to
+    `PDFProcessor` and it records the latest progress, forwarding every event
+    to any listeners (e.g. an SSE stream's ProgressPublisher). The text of each
+    streamed summary (one per stage, level and chunk) is accumulated so a
+    listener that joins late can be replayed one event per stream.
+    """
+
+    def __init__(self, filename):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.summary_streams = {}  # (stage, level, chunk) -> [text fragments, done], in order of first token
+        self._listeners = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add_listener(self, publisher, replay=False):
+        """Forwards future events to `publisher` (after replaying the streamed summaries so far, if asked).
+
+        A listener added after the job finished is closed right away.
+        """
+        with self._lock:
+            if replay:
+                for (stage, level, chunk), (parts, done) in self.summary_streams.items():
+                    publisher.publish(progress_events.SUMMARY_TOKEN, stage=stage, level=level, chunk=chunk,
+                                      text="".join(parts), done=done)
+            if self._closed:
+                publisher.close()
+            else:
+                self._listeners.append(publisher)
+
+    def remove_listener(self, publisher):
+        """Stops forwarding events to `publisher` (e.g. once its SSE client has gone)."""
+        with self._lock:
+            if publisher in self._listeners:
+                self._listeners.remove(publisher)
+
+    def publish(self, event_type, **fields):
+        with self._lock:
+            if event_type == progress_events.SUMMARY_TOKEN:  # Too chatty for `progress`
+                stream = self.summary_streams.setdefault((fields["stage"], fields["level"], fields["chunk"]),
+                                                         [[], False])
+                stream[0].append(fields["text"])
+                stream[1] = fields.get("done", False)
+            else:
+                self.progress = {**self.progress, "event": event_type, **fields}
+            for listener in self._listeners:
+                listener.publish(event_type, **fields)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for listener in self._listeners:
+                listener.close()
+
+    def to_dict(self):
+        """Returns the job's status (without its result) as a JSON-ready dict."""
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "created": round(self.created, 3),
+            "finished": round(self.finished, 3) if self.finished else None,
+        }
+
+
+class JobManager:
+    """Runs jobs on a bounded worker pool with queue-depth admission control.
+
+    At most `max_workers` jobs run at once and at most `max_queued` wait
+    behind them; further submissions raise `QueueFullError`. Finished jobs are
+    kept for `ttl` seconds so their status and result can be fetched.
+    """
+
+    def __init__(self, max_workers, max_queued, ttl):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._jobs = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, filename, fn, *args, listener=None):
+        """Queues `fn(job, *args)` and returns the job; raises QueueFullError when saturated."""
+        job = Job(filename)
+        if listener is not None:
+            job.add_listener(listener)
+        with self._lock:
+            self._evict(time.time())
+            if self._active >= self.max_workers + self.max_queued:
+                raise QueueFullError(f"{self._active} jobs already queued or running")
+            self._active += 1
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._evict(time.time())
+            return self._jobs.get(job_id)
+
+    def find_by_filename(self, filename):
+        """Returns the most recent job for a server-side filename, if any."""
+        with self._lock:
+            matches = [job for job in self._jobs.values() if job.filename == filename]
+        return max(matches, key=lambda job: job.created) if matches else None
+
+    def queue_depth(self):
+        """Returns the number of jobs queued or running."""
+        with self._lock:
+            return self._active
+
+    def _run(self, job, fn, args):
+        job.status = RUNNING
+        try:
+            job.result = fn(job, *args)
+            job.status = COMPLETE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            job.publish(progress_events.ERROR, message=job.error)
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._active -= 1
+            job.close()
+
+    def _evict(self, now):
+        """Forgets finished jobs older than the TTL (lock held)."""
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished is not None and now - job.finished > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
@@ -0,0 +1,68 @@
+import io
+
+
+class MarkdownRenderer:
+    """Renders the summary Markdown subset ('###' headings, '- ' bullets, paragraphs) to HTML as it arrives.
+
+    Text may be fed in any fragments, down to single model tokens: each line
+    is rendered as soon as its newline arrives, and consecutive bullets share
+    one <ul> (closed when the next heading or paragraph starts, or on close).
+    `feed` and `close` return only the HTML produced by that call, so it can
+    be sent on immediately; the whole document accumulates in a StringIO
+    buffer and is available from `getvalue`.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._partial = []  # Fragments of the line still waiting for its newline
+        self._in_list = False
+
+    def feed(self, text):
+        """Adds a fragment of Markdown and returns the HTML for the lines it completed."""
+        if "\n" not in text:
+            self._partial.append(text)
+            return ""
+        lines = text.split("\n")
+        self._partial.append(lines[0])
+        parts = []
+        self._render_line("".join(self._partial), parts)
+        for line in lines[1:-1]:
+            self._render_line(line, parts)
+        self._partial = [lines[-1]]
+        return self._write(parts)
+
+    def close(self):
+        """Renders the unterminated last line, closes an open list and returns that HTML."""
+        parts = []
+        self._render_line("".join(self._partial), parts)
+        self._partial = []
+        if self._in_list:
+            parts.append("</ul>")
+            self._in_list = False
+        return self._write(parts)
+
+    def getvalue(self):
+        return self._buffer.getvalue()
+
+    def _render_line(self, line, parts):
+        line = line.strip()
+        if not line:
+            return  # Blank lines neither emit anything nor end a list
+        is_item = line.startswith("- ")
+        if self._in_list and not is_item:
+            parts.append("</ul>")
+            self._in_list = False
+        if line.startswith("###"):
+            parts.append(f"<h3>{line[4:]}</h3>")
+        elif is_item:
+            if not self._in_list:
+                parts.append("<ul>")
+                self._in_list = True
+            parts.append(f"<li>{line[2:]}</li>")
+        else:
+            parts.append(f"<p>{line}</p>")
+
+    def _write(self, parts):
+        html = "".join(parts)
+        self._buffer.write(html)
+        return html
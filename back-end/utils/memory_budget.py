@@ -0,0 +1,206 @@
+import mmap
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", 0))  # 0 disables bounded-memory mode
+BASELINE_BYTES = 192 * 1024 * 1024  # Interpreter, numpy/sklearn/PyPDF2 and the server itself
+RASTER_SHARE = 0.4  # Share of the remaining budget given to cached page renders
+PAGE_BYTES = 4 * 1024 * 1024  # Working set of one in-flight page (parsed objects, text, render buffers)
+WORKER_BYTES = 24 * 1024 * 1024  # Per worker thread: its own PdfReader, object cache and malloc arena
+MAX_WORKERS = 8
+MIN_WINDOW = 2
+RSS_SAMPLE_INTERVAL = 0.05  # Seconds between memory samples while any report stage is open
+MAX_CACHED_OBJECTS = 2000  # Parsed PDF objects a reader keeps before its cache is dropped (bounded mode)
+
+
+class MemoryBudget:
+    """Splits a process memory budget between the pipeline's buffers.
+
+    After a fixed baseline, `RASTER_SHARE` of the budget caps the raster
+    cache (renders beyond it spill to disk). The rest pays for worker threads
+    (each parses the PDF with its own reader), up to half of it, and then for
+    pages in flight at roughly `PAGE_BYTES` each. Extracted text goes to a
+    TextSpool rather than staying in memory, and PDF readers drop their parsed
+    object cache every `max_cached_objects` objects.
+
+    The budget is per process: in process mode every page worker gets its own
+    copy (its raster cache and reader), so the job's total is up to
+    `workers + 1` budgets.
+    """
+
+    def __init__(self, budget_bytes, max_cached_objects=MAX_CACHED_OBJECTS):
+        self.budget_bytes = budget_bytes
+        self.max_cached_objects = max_cached_objects
+        available = max(0, budget_bytes - BASELINE_BYTES)
+        self.raster_bytes = int(available * RASTER_SHARE)
+        pages_bytes = int(available * (1 - RASTER_SHARE))
+        self.max_workers = max(1, min(MAX_WORKERS, pages_bytes // 2 // WORKER_BYTES))
+        self.window = max(MIN_WINDOW, (pages_bytes - self.max_workers * WORKER_BYTES) // PAGE_BYTES)
+
+    @classmethod
+    def from_env(cls):
+        """Returns the budget configured by MEMORY_BUDGET_MB, or None when unset."""
+        return cls(MEMORY_BUDGET_MB * 1024 * 1024) if MEMORY_BUDGET_MB > 0 else None
+
+    def __repr__(self):
+        return (f"MemoryBudget({self.budget_bytes // 2**20} MB: workers={self.max_workers}, "
+                f"window={self.window} pages, raster={self.raster_bytes // 2**20} MB)")
+
+
+class TextSpool:
+    """Append-only spill file for extracted text, read back through a memory map.
+
+    `append` writes UTF-8 text and returns its (offset, length) span; `view`
+    returns a zero-copy memoryview of a span and `text` decodes it, so a
+    chunk's text only exists as a Python string while it is being used. The
+    mapping is widened lazily as the file grows. The file is deleted on close.
+    """
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix="text_spool_", suffix=".txt", dir=directory)
+        self._file = os.fdopen(fd, "w+b")
+        self._size = 0
+        self._map = None
+        self._lock = threading.Lock()
+
+    def append(self, text):
+        data = text.encode("utf-8")
+        with self._lock:
+            offset = self._size
+            self._file.write(data)
+            self._size += len(data)
+        return offset, len(data)
+
+    def view(self, span):
+        offset, length = span
+        with self._lock:
+            if self._map is None or len(self._map) < offset + length:
+                self._file.flush()
+                # The old mapping is not closed: views handed out keep it alive until they are released
+                self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+            return memoryview(self._map)[offset:offset + length]
+
+    def text(self, span):
+        return str(self.view(span), "utf-8") if span[1] else ""
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                try:
+                    self._map.close()
+                except BufferError:
+                    pass  # A view is still alive; the mapping goes with it
+            self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def peak_rss():
+    """Peak resident set size of this process so far, in bytes."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+class _StagePeaks:
+    __slots__ = ("rss", "traced")
+
+    def __init__(self):
+        self.rss = 0
+        self.traced = 0
+
+    def sample(self, rss, traced):
+        self.rss = max(self.rss, rss)
+        self.traced = max(self.traced, traced)
+
+
+_open_stages = set()
+_sampler_lock = threading.Lock()
+_sampler_running = False
+
+
+def _traced_memory():
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+
+def _sample_open_stages():
+    """Sampler thread body: feeds every open stage the current RSS until none is left."""
+    global _sampler_running
+    while True:
+        with _sampler_lock:
+            if not _open_stages:
+                _sampler_running = False
+                return
+            stages = list(_open_stages)
+        rss, traced = current_rss(), _traced_memory()
+        for peaks in stages:
+            peaks.sample(rss, traced)
+        time.sleep(RSS_SAMPLE_INTERVAL)
+
+
+class MemoryReport:
+    """Records RSS (and tracemalloc, when tracing is on) around each pipeline stage.
+
+    Use as `with report.stage("extract"): ...`. Each stage records the RSS
+    on entry and exit and the peak RSS while it ran, plus, if tracemalloc is
+    tracing (e.g. PYTHONTRACEMALLOC=1), the peak of traced Python memory.
+    Peaks are sampled every RSS_SAMPLE_INTERVAL seconds by one shared thread
+    rather than read from process-wide high-water marks (VmHWM, tracemalloc's
+    peak), which cover the process's whole life and which a concurrent job's
+    reset would clobber. Figures are for the whole process, so they include
+    any job running alongside.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        global _sampler_running
+        peaks = _StagePeaks()
+        start_rss, start = current_rss(), time.perf_counter()
+        peaks.sample(start_rss, _traced_memory())
+        with _sampler_lock:
+            _open_stages.add(peaks)
+            if not _sampler_running:
+                _sampler_running = True
+                threading.Thread(target=_sample_open_stages, name="memory-sampler", daemon=True).start()
+        try:
+            yield
+        finally:
+            with _sampler_lock:
+                _open_stages.discard(peaks)
+            end_rss = current_rss()
+            peaks.sample(end_rss, _traced_memory())
+            entry = {
+                "seconds": round(time.perf_counter() - start, 3),
+                "rss_start_mb": round(start_rss / 2**20, 1),
+                "rss_end_mb": round(end_rss / 2**20, 1),
+                "peak_rss_mb": round(peaks.rss / 2**20, 1),
+            }
+            if tracemalloc.is_tracing():
+                entry["traced_peak_mb"] = round(peaks.traced / 2**20, 1)
+            self.stages[name] = entry
+
+    def as_dict(self):
+        return dict(self.stages)
@@ -0,0 +1,227 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds: sub-millisecond page opens up to multi-minute model calls
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+# Payload sizes: a short text layer up to a 300 DPI full-page render
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+MAX_SPANS = 20000  # Spans kept per job trace; later ones are only counted
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("pdf_stage_duration_seconds", "Time spent in each pipeline stage.",
+                          DURATION_BUCKETS, ("stage",))
+STAGE_BYTES = Histogram("pdf_stage_bytes", "Payload handled per stage call (image bytes, text characters).",
+                        SIZE_BUCKETS, ("stage",))
+STAGE_ERRORS = Counter("pdf_stage_errors_total", "Stage calls that raised.", ("stage",))
+REGISTRY = [STAGE_SECONDS, STAGE_BYTES, STAGE_ERRORS]
+
+
+def render_prometheus(registry=REGISTRY):
+    """Returns every metric in the Prometheus text exposition format (version 0.0.4)."""
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+class Trace:
+    """The spans recorded for one job, in the order they finished.
+
+    Spans from any thread are attached to the trace that thread is using
+    (see `use_trace`). Process-mode page workers record into a SpanRecorder
+    instead, and their spans reach the job's trace with each page result.
+    """
+
+    def __init__(self, trace_id=None, max_spans=MAX_SPANS):
+        self.id = trace_id
+        self.max_spans = max_spans
+        self.started = time.time()
+        self._origin = time.perf_counter()
+        self.spans = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, duration, size, attributes):
+        span = {"stage": stage, "start_ms": round((start - self._origin) * 1000, 3),
+                "duration_ms": round(duration * 1000, 3), "thread": threading.current_thread().name}
+        if size is not None:
+            span["bytes"] = size
+        span.update(attributes)
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+
+    def totals(self):
+        """Returns {stage: {"count", "seconds", "bytes"}} over the recorded spans."""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                entry = totals.setdefault(span["stage"], {"count": 0, "seconds": 0.0, "bytes": 0})
+                entry["count"] += 1
+                entry["seconds"] += span["duration_ms"] / 1000
+                entry["bytes"] += span.get("bytes", 0)
+        for entry in totals.values():
+            entry["seconds"] = round(entry["seconds"], 3)
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        return {"trace_id": self.id, "started": round(self.started, 3), "totals": self.totals(),
+                "spans": spans, "dropped": self.dropped}
+
+
+class SpanRecorder:
+    """Stand-in trace for a process-mode page worker, whose own histograms nobody reads.
+
+    Keeps raw span records until `drain()` ships them to the parent, which
+    feeds them to its histograms and the job's trace with `replay_spans`.
+    """
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, duration, size, attributes):
+        with self._lock:
+            self._records.append((stage, start, duration, size, {**attributes, "pid": os.getpid()}))
+
+    def drain(self):
+        """Returns the records collected so far (as a tuple, cheap to pickle) and forgets them."""
+        with self._lock:
+            records, self._records = tuple(self._records), []
+        return records
+
+
+def replay_spans(records, trace=None):
+    """Records spans measured in another process into this process's histograms and `trace`.
+
+    Span starts are `perf_counter` readings, which share one monotonic clock
+    across the processes of a host, so they line up with the parent's spans.
+    """
+    for stage, start, duration, size, attributes in records:
+        STAGE_SECONDS.observe(duration, stage=stage)
+        if size is not None:
+            STAGE_BYTES.observe(size, stage=stage)
+        if trace is not None:
+            trace.add(stage, start, duration, size, attributes)
+
+
+_local = threading.local()
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def use_trace(trace):
+    """Attaches spans recorded by this thread to `trace` for the duration of the block."""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+class Span:
+    """Handle yielded by `span`; set `bytes` (or add attributes) before the block ends."""
+    __slots__ = ("bytes", "attributes")
+
+    def __init__(self, size, attributes):
+        self.bytes = size
+        self.attributes = attributes
+
+
+@contextmanager
+def span(stage, size=None, **attributes):
+    """Times a stage call into the stage histograms and, if a trace is in use, the job's trace."""
+    record = Span(size, attributes)
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage)
+        if record.bytes is not None:
+            STAGE_BYTES.observe(record.bytes, stage=stage)
+        trace = current_trace()
+        if trace is not None:
+            trace.add(stage, start, duration, record.bytes, record.attributes)
@@ -0,0 +1,156 @@
+import os
+import queue
+import multiprocessing
+import shlex
+import subprocess
+import tempfile
+import threading
+import concurrent.futures
+import numpy as np
+import pytesseract
+from PIL import Image
+from utils.metrics import span
+
+try:  # Optional: in-process tesseract API that keeps the language model loaded
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", 0))  # 0: one per CPU, or one inside a process-mode page worker
+PAGE_SEPARATOR = "\f"  # Tesseract's default separator between pages of a multi-image run
+
+
+def to_pil(image):
+    """Accepts a PIL image or a numpy array (grayscale or RGB)."""
+    return image if isinstance(image, Image.Image) else Image.fromarray(np.asarray(image))
+
+
+def default_workers():
+    """Concurrent OCR calls per process: OCR_WORKERS if set, else one per CPU.
+
+    A process-mode page worker gets one, since the page pool already runs a
+    process per CPU and each would otherwise load a model per CPU as well.
+    """
+    if OCR_WORKERS > 0:
+        return OCR_WORKERS
+    return 1 if multiprocessing.parent_process() is not None else os.cpu_count() or 4
+
+
+class OCRBackend:
+    """Common interface: OCR one image, or many images/crops in a single call."""
+
+    def image_to_string(self, image, config=""):
+        return self.image_to_string_batch([image], config)[0]
+
+    def image_to_string_batch(self, images, config=""):
+        raise NotImplementedError
+
+
+class TesserocrBackend(OCRBackend):
+    """Pool of long-lived `tesserocr` API handles, created as concurrent calls need them.
+
+    Each handle loads the language model once and is reused for every image,
+    so there is no process spawn, temp file or model reload per call. A new
+    handle is only created when every existing one for that config is busy,
+    so a config never holds more handles than `workers`, and usually fewer.
+    """
+
+    def __init__(self, workers=None):
+        workers = workers or default_workers()
+        self.workers = workers
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    @staticmethod
+    def _api_options(config):
+        """Maps pytesseract-style flags (`--oem N --psm N`) onto tesserocr arguments."""
+        args = shlex.split(config)
+        options = {}
+        for flag, key, enum in (("--psm", "psm", tesserocr.PSM), ("--oem", "oem", tesserocr.OEM)):
+            if flag in args:
+                options[key] = enum(int(args[args.index(flag) + 1]))
+        return options
+
+    def _pool(self, config):
+        """Returns the idle handles for `config` (a queue that starts empty)."""
+        with self._lock:
+            pool = self._pools.get(config)
+            if pool is None:
+                pool = self._pools[config] = queue.SimpleQueue()
+            return pool
+
+    def _ocr_one(self, pool, config, image):
+        try:
+            api = pool.get_nowait()
+        except queue.Empty:  # Every handle is busy (at most `workers` run at once, on our executor)
+            api = tesserocr.PyTessBaseAPI(**self._api_options(config))
+        try:
+            api.SetImage(to_pil(image))
+            return api.GetUTF8Text()
+        finally:
+            pool.put(api)
+
+    def image_to_string_batch(self, images, config=""):
+        pool = self._pool(config)
+        with span("ocr", images=len(images)) as record:
+            texts = list(self._executor.map(lambda image: self._ocr_one(pool, config, image), images))
+            record.bytes = sum(len(text) for text in texts)
+        return texts
+
+
+class TesseractCLIBackend(OCRBackend):
+    """Batches images into one `tesseract` process per call.
+
+    Tesseract accepts a text file listing images and OCRs them all in a single
+    run (separated by form feeds), so a page's crops cost one process spawn
+    and one model load instead of one each. A semaphore caps concurrent runs.
+    """
+
+    def __init__(self, workers=None):
+        self._slots = threading.BoundedSemaphore(workers or default_workers())
+
+    def image_to_string_batch(self, images, config=""):
+        if not images:
+            return []
+        with self._slots, span("ocr", images=len(images)) as record, \
+                tempfile.TemporaryDirectory(prefix="ocr_batch_") as tmp:
+            paths = []
+            for index, image in enumerate(images):
+                path = os.path.join(tmp, f"{index}.pnm")
+                to_pil(image).save(path, format="PPM")  # Uncompressed: cheap to write and to decode
+                paths.append(path)
+            list_path = os.path.join(tmp, "images.txt")
+            with open(list_path, "w") as f:
+                f.write("\n".join(paths) + "\n")
+
+            command = [pytesseract.pytesseract.tesseract_cmd, list_path, "stdout", *shlex.split(config)]
+            output = subprocess.run(command, check=True, capture_output=True).stdout.decode("utf-8", "replace")
+            record.bytes = len(output)
+
+        texts = output.split(PAGE_SEPARATOR)
+        texts += [""] * (len(images) - len(texts))  # Blank images may emit nothing at all
+        return texts[:len(images)]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """Process-mode workers build their own pool instead of sharing the parent's handles."""
+    global _backend, _backend_lock
+    _backend = None
+    _backend_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_ocr_backend():
+    """Returns the process-wide OCR backend, preferring persistent tesserocr workers."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = TesserocrBackend() if tesserocr is not None else TesseractCLIBackend()
+        return _backend
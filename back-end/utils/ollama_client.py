@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.metrics import span
+
+OLLAMA_API_URL = os.environ.get("OLLAMA_API_URL", "http://localhost:11434/api/generate")
+OLLAMA_CONCURRENCY = int(os.environ.get("OLLAMA_CONCURRENCY", 4))  # Requests in flight per backend
+OLLAMA_TIMEOUT = (5, 600)  # (connect, read) seconds; a long chunk can take minutes on CPU
+OLLAMA_RETRIES = 3
+
+
+class OllamaClient:
+    """Pooled, concurrency-limited client for Ollama's generate endpoint.
+
+    One `requests.Session` keeps up to `concurrency` keep-alive connections
+    open, a semaphore caps requests in flight (Ollama queues the rest anyway,
+    but holding them here keeps timeouts meaningful), and transient failures
+    are retried with exponential backoff.
+    """
+
+    def __init__(self, url=OLLAMA_API_URL, concurrency=OLLAMA_CONCURRENCY, timeout=OLLAMA_TIMEOUT,
+                 retries=OLLAMA_RETRIES):
+        self.url = url
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(concurrency)
+        retry = Retry(total=retries, connect=retries, read=retries, backoff_factor=0.5,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["POST"]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, model, prompt, **payload):
+        """Runs one non-streaming generation and returns the response text ('' if none)."""
+        with self._slots, span("ollama", len(prompt), model=model, stream=False) as record:
+            response = self.session.post(self.url, json={"model": model, "prompt": prompt, "stream": False, **payload},
+                                         timeout=self.timeout)
+            response.raise_for_status()
+            text = response.json().get("response", "")
+            record.attributes["response_chars"] = len(text)
+        return text
+
+    def generate_stream(self, model, prompt, **payload):
+        """Yields response text fragments as Ollama generates them (one NDJSON line per fragment).
+
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        with self._slots, span("ollama", len(prompt), model=model, stream=True) as record:
+            received = 0
+            try:
+                with self.session.post(self.url, json={"model": model, "prompt": prompt, "stream": True, **payload},
+                                       stream=True, timeout=self.timeout) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        message = json.loads(line)
+                        if message.get("error"):
+                            raise RuntimeError(f"Ollama error: {message['error']}")
+                        if message.get("response"):
+                            received += len(message["response"])
+                            yield message["response"]
+                        if message.get("done"):
+                            break
+            finally:
+                record.attributes["response_chars"] = received
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_ollama_client(url=OLLAMA_API_URL):
+    """Returns the shared client for `url`, so every job draws from one connection pool and limit."""
+    with _clients_lock:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = OllamaClient(url)
+        return client
@@ -0,0 +1,192 @@
+import os
+import time
+import uuid
+import itertools
+import threading
+import multiprocessing
+import concurrent.futures
+from collections import OrderedDict, deque, namedtuple
+
+THREAD_MODE = "thread"
+PROCESS_MODE = "process"
+EXECUTION_MODES = (THREAD_MODE, PROCESS_MODE)
+THREAD_WORKERS = 8  # I/O-friendly default for thread mode
+RANGES_PER_WORKER = 2  # Ranges kept queued per worker so no worker idles between ranges
+MIN_RANGE_PAGES = 4  # Pages per range at least, so many-core pools don't pay a round trip per page
+# Workers must not fork from the threaded server: a lock held at fork time (metrics, logging, caches) never unlocks
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+WORKER_CONTEXTS = 4  # Per-job contexts (reader, raster cache) a pooled worker process keeps at most
+WORKER_CONTEXT_IDLE = 60  # Seconds after which a worker closes a context no range has used
+DEFAULT_WINDOW = 64  # Pages in flight (submitted but not yet consumed) at any time
+
+
+class PageResult(namedtuple("PageResult", ["page", "text", "charts", "ocr", "spans"], defaults=(False, ()))):
+    """Compact per-page result shipped back from workers.
+
+    `charts` holds one (bbox, values) pair of tuples per detected figure
+    region, which pickles far smaller than the equivalent list of dicts. `ocr`
+    records whether the text came from the OCR fallback. `spans` carries the
+    stage spans a process-mode worker recorded for the page (empty otherwise).
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_charts(cls, page, text, chart_data, ocr=False):
+        charts = tuple((tuple(chart.get("bbox", ())), tuple(chart.get("chart_data", ()))) for chart in chart_data)
+        return cls(page, text, charts, ocr)
+
+    def to_dict(self):
+        """Expands the result into the page dict returned by the API."""
+        return {
+            "page": self.page,
+            "text": self.text,
+            "charts": [{"bbox": list(bbox), "chart_data": list(values)} for bbox, values in self.charts],
+        }
+
+
+def available_cpus():
+    """Returns the number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+_worker_contexts = OrderedDict()  # Per worker process: run id -> [context, last used], least recent first
+
+
+def _close_context(context):
+    close = getattr(context, "close", None)
+    if close is not None:
+        close()
+
+
+def _worker_context(run_id, context_factory, factory_args):
+    """Returns this worker's context for one `map_pages` run, building it on the run's first range.
+
+    Workers outlive runs (the pool is shared), so contexts idle for WORKER_CONTEXT_IDLE seconds, or
+    beyond the WORKER_CONTEXTS most recent, are closed.
+    """
+    now = time.monotonic()
+    entry = _worker_contexts.pop(run_id, None)
+    for stale_id, (context, last_used) in list(_worker_contexts.items()):
+        if now - last_used > WORKER_CONTEXT_IDLE or len(_worker_contexts) >= WORKER_CONTEXTS:
+            del _worker_contexts[stale_id]
+            _close_context(context)
+    if entry is None:
+        entry = [context_factory(*factory_args), now]
+    entry[1] = now
+    _worker_contexts[run_id] = entry
+    return entry[0]
+
+
+def _run_range_in_worker(page_task, run_id, context_factory, factory_args, start, end):
+    context = _worker_context(run_id, context_factory, factory_args)
+    return [page_task(context, page) for page in range(start, end + 1)]
+
+
+_process_pools = {}  # max_workers -> ProcessPoolExecutor shared by every run in this process
+_process_pools_lock = threading.Lock()
+
+
+def get_process_pool(max_workers):
+    """Returns the long-lived process pool of this size, starting it (or replacing a broken one) if needed.
+
+    Starting workers costs an interpreter and the pipeline's imports each, so
+    they are kept for the life of the server instead of per job.
+    """
+    with _process_pools_lock:
+        pool = _process_pools.get(max_workers)
+        if pool is None or pool._broken:
+            pool = _process_pools[max_workers] = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD))
+        return pool
+
+
+def shutdown_process_pools():
+    """Stops every shared worker process (at server shutdown)."""
+    with _process_pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(cancel_futures=True)
+
+
+def _run_range(page_task, context, start, end):
+    return [page_task(context, page) for page in range(start, end + 1)]
+
+
+class PageExecutor:
+    """Runs a per-page task over a document on a thread or process pool.
+
+    Pages are handed out as contiguous ranges. In process mode the ranges go
+    to a pool shared by every run (see `get_process_pool`), and each worker
+    builds its own context for the run through `context_factory` (so each
+    keeps its own PDF reader and raster cache); in thread mode the caller's
+    `context` is shared, since those objects are thread-safe. Process workers
+    are started with START_METHOD rather than forked, so `page_task`,
+    `context_factory` and `factory_args` must be picklable.
+    """
+
+    def __init__(self, mode=THREAD_MODE, max_workers=None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode {mode!r}; expected one of {EXECUTION_MODES}")
+        self.mode = mode
+        if max_workers is None:
+            max_workers = available_cpus() if mode == PROCESS_MODE else THREAD_WORKERS
+        self.max_workers = max(1, max_workers)
+
+    def range_size(self, window, num_pages):
+        """Pages per range so that about RANGES_PER_WORKER ranges per worker fit in `window`.
+
+        Ranges hold at least MIN_RANGE_PAGES pages, unless the document is too
+        short to give every worker a range that size.
+        """
+        size = max(MIN_RANGE_PAGES, window // (self.max_workers * RANGES_PER_WORKER))
+        return max(1, min(size, -(-num_pages // self.max_workers)))
+
+    def map_pages(self, page_task, num_pages, context=None, context_factory=None, factory_args=(),
+                  window=DEFAULT_WINDOW, on_submit=None):
+        """Yields `page_task(context, page)` for every page, in page order.
+
+        At most `window` pages (rounded to whole ranges) are submitted but not
+        yet consumed, so results never pile up faster than the caller reads them.
+        `on_submit(start, end)` is called as each range is handed to the pool.
+        """
+        if num_pages < 1:
+            return
+        size = self.range_size(window, num_pages)
+        ranges = ((start, min(start + size - 1, num_pages)) for start in range(1, num_pages + 1, size))
+        max_in_flight = max(1, window // size)
+
+        if self.mode == PROCESS_MODE:
+            executor = get_process_pool(self.max_workers)
+            run_id = uuid.uuid4().hex
+            submit_range = lambda start, end: executor.submit(_run_range_in_worker, page_task, run_id,
+                                                              context_factory, factory_args, start, end)
+        else:
+            if context is None:
+                context = context_factory(*factory_args)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+            submit_range = lambda start, end: executor.submit(_run_range, page_task, context, start, end)
+
+        def submit(start, end):
+            future = submit_range(start, end)
+            if on_submit is not None:
+                on_submit(start, end)
+            return future
+
+        in_flight = deque()
+        try:
+            for start, end in itertools.islice(ranges, max_in_flight):
+                in_flight.append(submit(start, end))
+            while in_flight:
+                results = in_flight.popleft().result()
+                for start, end in itertools.islice(ranges, 1):
+                    in_flight.append(submit(start, end))
+                yield from results
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if self.mode != PROCESS_MODE:  # The process pool is shared and stays up
+                executor.shutdown()
@@ -0,0 +1,71 @@
+import mmap
+import threading
+import PyPDF2
+from utils.metrics import span
+
+
+class PageSource:
+    """Shared, thread-safe access to the pages of one PDF.
+
+    The file is memory-mapped and parsed once per worker thread, so every page
+    lookup reuses the same `PdfReader` (and its parsed xref/object tree)
+    instead of reopening and re-parsing the PDF for each page. With
+    `max_cached_objects`, a reader drops its cache of resolved objects once it
+    grows past that many, so memory stays flat across thousands of pages.
+    """
+
+    def __init__(self, pdf_path, max_cached_objects=None):
+        self.pdf_path = pdf_path
+        self.max_cached_objects = max_cached_objects
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handles = []
+        self.num_pages = len(self.reader.pages)
+
+    @property
+    def reader(self):
+        """Returns the `PdfReader` owned by the calling thread, creating it on first use."""
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            with span("pdf_open"):
+                f = open(self.pdf_path, 'rb')
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                reader = PyPDF2.PdfReader(mapped)
+            with self._lock:
+                self._handles.append((f, mapped))
+            self._local.reader = reader
+        return reader
+
+    def get_page(self, page_number):
+        """Returns the 1-based page object, or None if the page is out of range."""
+        if page_number < 1 or page_number > self.num_pages:
+            return None
+        with span("page_open", page=page_number):
+            return self.reader.pages[page_number - 1]
+
+    def extract_text(self, page_number):
+        """Returns the text layer of a 1-based page ('' when the page has none)."""
+        page = self.get_page(page_number)
+        if page is None:
+            return ""
+        with span("text_layer", page=page_number) as record:
+            text = page.extract_text() or ""
+            record.bytes = len(text)
+        if self.max_cached_objects and len(self.reader.resolved_objects) > self.max_cached_objects:
+            self.reader.resolved_objects.clear()  # Objects are re-parsed from the mapped file if needed again
+        return text
+
+    def close(self):
+        """Releases every mapping and file handle opened by worker threads."""
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for f, mapped in handles:
+            mapped.close()
+            f.close()
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
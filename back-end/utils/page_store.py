@@ -0,0 +1,104 @@
+import array
+import bisect
+import json
+import os
+import shutil
+import time
+
+PAGES_FILE = "pages.jsonl"
+INDEX_FILE = "pages.idx"  # (page number, byte offset, byte length) per line, as native uint64 triples
+INDEX_ENTRY_BYTES = 3 * array.array("Q").itemsize
+READ_BLOCK = 1024 * 1024  # Page ranges are streamed back in 1MB reads
+
+
+class PageStore:
+    """One document's extracted pages on disk: JSON lines plus a binary offset index.
+
+    Pages are appended as they are extracted, one compact JSON object per
+    line, and each line's position is appended to the index, so a page or a
+    range of pages is a binary search, a seek and a read, handed back as raw
+    NDJSON bytes without ever being parsed. A line is flushed before its index
+    entry, so readers can follow a store that is still being written.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._pages = None  # Writer handles, opened by `create`
+        self._index = None
+        self._offset = 0
+
+    @classmethod
+    def create(cls, directory):
+        """Starts a new, empty store in `directory` (created if needed)."""
+        os.makedirs(directory, exist_ok=True)
+        store = cls(directory)
+        store._pages = open(os.path.join(directory, PAGES_FILE), "wb")
+        store._index = open(os.path.join(directory, INDEX_FILE), "wb")
+        return store
+
+    def append(self, page):
+        """Writes one page dict (with its "page" number) and indexes it."""
+        line = json.dumps(page, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        self._pages.write(line)
+        self._pages.flush()
+        self._index.write(array.array("Q", (page["page"], self._offset, len(line))).tobytes())
+        self._index.flush()
+        self._offset += len(line)
+
+    def close(self):
+        for handle in (self._pages, self._index):
+            if handle is not None:
+                handle.close()
+        self._pages = self._index = None
+
+    def _read_index(self):
+        """Returns (page numbers, offsets, lengths) for every fully indexed line."""
+        with open(os.path.join(self.directory, INDEX_FILE), "rb") as f:
+            data = f.read()
+        entries = array.array("Q")
+        entries.frombytes(data[:len(data) - len(data) % INDEX_ENTRY_BYTES])  # Skip a half-written entry
+        return entries[0::3], entries[1::3], entries[2::3]
+
+    def __len__(self):
+        return os.path.getsize(os.path.join(self.directory, INDEX_FILE)) // INDEX_ENTRY_BYTES
+
+    def read_page(self, page_number):
+        """Returns one page's JSON line (bytes), or None if it is not stored (yet)."""
+        pages, offsets, lengths = self._read_index()
+        i = bisect.bisect_left(pages, page_number)
+        if i == len(pages) or pages[i] != page_number:
+            return None
+        with open(os.path.join(self.directory, PAGES_FILE), "rb") as f:
+            f.seek(offsets[i])
+            return f.read(lengths[i])
+
+    def iter_range(self, start=1, end=None):
+        """Yields the JSON lines of pages `start`..`end` (inclusive; None for the last) in READ_BLOCK pieces."""
+        pages, offsets, lengths = self._read_index()
+        first = bisect.bisect_left(pages, start)
+        last = len(pages) if end is None else bisect.bisect_right(pages, end)
+        if first >= last:
+            return
+        position, remaining = offsets[first], offsets[last - 1] + lengths[last - 1] - offsets[first]
+        with open(os.path.join(self.directory, PAGES_FILE), "rb") as f:
+            f.seek(position)
+            while remaining > 0:
+                block = f.read(min(READ_BLOCK, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
+
+def sweep_page_stores(root, max_age):
+    """Deletes stores under `root` not written or touched for `max_age` seconds."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path)
+        except OSError:
+            continue
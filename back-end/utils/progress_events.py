@@ -0,0 +1,47 @@
+import time
+
+# Event types published while a PDF is processed
+INDEX_EXTRACTED = "index_extracted"
+PAGE_STARTED = "page_started"
+PAGE_FINISHED = "page_finished"
+OCR_FALLBACK = "ocr_fallback"
+CHUNK_SUMMARIZED = "chunk_summarized"
+SUMMARY_TOKEN = "summary_token"  # Visible summary text as the model streams it (stage, level, chunk, text, done)
+SUMMARY_STARTED = "summary_started"
+COMPLETE = "complete"
+ERROR = "error"
+
+
+class ProgressPublisher:
+    """Publishes structured progress events from worker threads onto an asyncio queue.
+
+    Events are plain dicts (`{"event": ..., "time": ..., **fields}`) so they can
+    be forwarded as JSON. `close()` enqueues a `None` sentinel to end the stream.
+    """
+
+    def __init__(self, queue, loop):
+        self.queue = queue
+        self.loop = loop
+
+    def publish(self, event_type, **fields):
+        event = {"event": event_type, "time": round(time.time(), 3), **fields}
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, None)
+
+
+class ProgressEstimator:
+    """Tracks completed pages and estimates the remaining time from the observed rate."""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.start = time.time()
+
+    def advance(self):
+        """Marks one more page done and returns (pages_done, eta_seconds)."""
+        self.done += 1
+        elapsed = time.time() - self.start
+        eta = elapsed / self.done * (self.total - self.done)
+        return self.done, round(eta, 1)
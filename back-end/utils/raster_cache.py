@@ -0,0 +1,166 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from PIL import Image
+from pdf2image import convert_from_path
+from utils.metrics import span
+
+DEFAULT_DPI = 200  # pdf2image's default, kept so cached renders match previous output
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # In-memory budget before renders spill to disk
+LAYOUT_DPI = int(os.environ.get("LAYOUT_DPI", 72))  # Enough to find figures; ~8x fewer pixels than 200 DPI
+OCR_DPI = int(os.environ.get("OCR_DPI", 300))  # Tesseract's sweet spot for body-size text
+
+
+class RenderProfile:
+    """How pages are rasterized for one job.
+
+    Pages are rendered straight to grayscale (no RGB decode or channel
+    conversion) at `layout_dpi` for layout and figure detection; only the
+    regions that need OCR, or pages without a text layer, are rendered at
+    `ocr_dpi`.
+    """
+
+    def __init__(self, layout_dpi=LAYOUT_DPI, ocr_dpi=OCR_DPI, grayscale=True):
+        self.layout_dpi = layout_dpi
+        self.ocr_dpi = ocr_dpi
+        self.grayscale = grayscale
+
+    def __repr__(self):
+        return f"RenderProfile(layout_dpi={self.layout_dpi}, ocr_dpi={self.ocr_dpi}, grayscale={self.grayscale})"
+
+
+def render_region(pdf_path, page_number, box, dpi, grayscale=True):
+    """Renders only `box` ([x, y, w, h] in PDF points from the top-left) of a page at `dpi`.
+
+    Uses pdftoppm's crop options, so the rest of the page is never rasterized.
+    """
+    scale = dpi / 72.0
+    x, y, w, h = (int(round(value * scale)) for value in box)
+    with span("rasterize", page=page_number, dpi=dpi, region=True) as record, \
+            tempfile.TemporaryDirectory(prefix="region_") as tmp:
+        out_root = os.path.join(tmp, "region")
+        command = ["pdftoppm", "-f", str(page_number), "-l", str(page_number), "-r", str(dpi),
+                   "-x", str(x), "-y", str(y), "-W", str(max(1, w)), "-H", str(max(1, h)), "-singlefile"]
+        if grayscale:
+            command.append("-gray")
+        subprocess.run(command + [pdf_path, out_root], check=True, capture_output=True)
+        with Image.open(out_root + (".pgm" if grayscale else ".ppm")) as image:
+            image.load()
+            record.bytes = image.width * image.height * len(image.getbands())
+            return image
+
+
+class RasterCache:
+    """Render-once cache of page images shared by the OCR and chart stages.
+
+    Entries are keyed by (pdf, page, dpi, colorspace). Decoded images live in a
+    byte-budgeted LRU; once the budget is exceeded the least recently used
+    renders are spilled to raw files on disk and reloaded on the next hit, so a
+    page is never rasterized twice within one job.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._owns_spill_dir = spill_dir is None
+        self._memory = OrderedDict()  # key -> PIL image
+        self._spilled = {}  # key -> (mode, size, path)
+        self._render_locks = {}
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.renders = 0
+        self.hits = 0
+
+    @staticmethod
+    def image_bytes(image):
+        """Returns the decoded size of an image in bytes."""
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, pdf_path, page_number, dpi=DEFAULT_DPI, grayscale=False):
+        """Returns the rendered page, rasterizing it only on the first request."""
+        key = (os.path.abspath(pdf_path), page_number, dpi, "L" if grayscale else "RGB")
+        image = self._lookup(key)
+        if image is not None:
+            return image
+
+        with self._lock:
+            render_lock = self._render_locks.setdefault(key, threading.Lock())
+        with render_lock:
+            # Another thread may have rendered the page while we waited.
+            image = self._lookup(key)
+            if image is not None:
+                return image
+            with span("rasterize", page=page_number, dpi=dpi) as record:
+                images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number,
+                                           last_page=page_number, grayscale=grayscale)
+                image = images[0] if images else None
+                record.bytes = self.image_bytes(image) if image is not None else 0
+            if image is not None:
+                with self._lock:
+                    self.renders += 1
+                    self._store(key, image)
+        with self._lock:
+            self._render_locks.pop(key, None)
+        return image
+
+    def peek(self, pdf_path, page_number, dpi=DEFAULT_DPI, grayscale=False):
+        """Returns the render if it is already cached, without rendering it."""
+        return self._lookup((os.path.abspath(pdf_path), page_number, dpi, "L" if grayscale else "RGB"))
+
+    def discard_page(self, pdf_path, page_number):
+        """Drops every render of a page once no stage needs it anymore."""
+        pdf_path = os.path.abspath(pdf_path)
+        with self._lock:
+            for key in [k for k in self._memory if k[0] == pdf_path and k[1] == page_number]:
+                self.memory_bytes -= self.image_bytes(self._memory.pop(key))
+            for key in [k for k in self._spilled if k[0] == pdf_path and k[1] == page_number]:
+                os.remove(self._spilled.pop(key)[2])
+
+    def close(self):
+        """Frees every cached image and removes spilled files."""
+        with self._lock:
+            self._memory.clear()
+            self._spilled.clear()
+            self.memory_bytes = 0
+            if self.spill_dir and self._owns_spill_dir:
+                shutil.rmtree(self.spill_dir, ignore_errors=True)
+                self.spill_dir = None
+
+    def _lookup(self, key):
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return image
+            spilled = self._spilled.pop(key, None)
+            if spilled is None:
+                return None
+            mode, size, path = spilled
+            with open(path, "rb") as f:
+                image = Image.frombytes(mode, size, f.read())
+            os.remove(path)
+            self.hits += 1
+            self._store(key, image)
+            return image
+
+    def _store(self, key, image):
+        """Inserts an image and spills LRU entries until the budget is met (lock held)."""
+        self._memory[key] = image
+        self.memory_bytes += self.image_bytes(image)
+        while self.memory_bytes > self.max_bytes and len(self._memory) > 1:
+            old_key, old_image = self._memory.popitem(last=False)
+            self.memory_bytes -= self.image_bytes(old_image)
+            self._spill(old_key, old_image)
+
+    def _spill(self, key, image):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="raster_cache_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{abs(hash(key)):x}_{key[1]}_{key[2]}_{key[3]}.raw")
+        with open(path, "wb") as f:
+            f.write(image.tobytes())
+        self._spilled[key] = (image.mode, image.size, path)
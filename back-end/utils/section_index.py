@@ -0,0 +1,171 @@
+import bisect
+import re
+from collections import namedtuple
+
+TOC_SCAN_PAGES = 12  # Table-of-contents pages are looked for among the first pages only
+MIN_TOC_ENTRIES = 3  # Lines that must look like "Title .... 12" before a page counts as a TOC
+TOC_KEYWORDS = re.compile(r'\b(contents|index)\b', re.IGNORECASE)
+# "1. Title 03", "2.1 Title ..... 14" or "Title ........ 7", one per line
+TOC_LINE = re.compile(r'^\s*(?:(\d+(?:\.\d+)*)\.?\s+)?(\S.*?)(?:\s*\.{3,}\s*|\s+)(\d{1,4})\s*$', re.MULTILINE)
+# The original "N. Title page" pattern, for TOCs whose text layer has no line breaks
+INLINE_TOC_ENTRY = re.compile(r'(\d+)\.\s*(.+?)\s+(\d+)')
+
+Section = namedtuple("Section", "title start_page end_page")
+
+
+def trie_pattern(words):
+    """Returns one regex alternation for `words`, factored by common prefixes.
+
+    A flat `a|b|c...` alternation makes Python's backtracking engine try every
+    title at every position; the trie-shaped pattern only follows branches
+    that match, so scanning costs O(text length x longest title) regardless of
+    how many titles there are. Longer titles win over their prefixes.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node):
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+class SectionMatcher:
+    """Attributes text to sections by spotting their titles, in one pass over the text.
+
+    Mirrors the original line-based rule (a line that mentions a title starts
+    that section, and the line's words count towards it) with a single
+    trie-shaped pattern run over the lowercased text (several times faster
+    than re.IGNORECASE). State carries over between calls, so streamed pages
+    can be fed one at a time.
+    """
+
+    def __init__(self, titles):
+        self.titles = {title.lower(): title for title in titles if title.strip()}
+        self.pattern = re.compile(trie_pattern(self.titles)) if self.titles else None
+        self.current = None
+
+    def count_words(self, text, counts):
+        """Adds the words of `text` to `counts[title]` for the section in effect on each line."""
+        if self.pattern is None:
+            return counts
+        text = text.lower()
+        position = 0  # Start of the stretch that belongs to `self.current`
+        for match in self.pattern.finditer(text):
+            line_start = text.rfind("\n", 0, match.start()) + 1
+            if line_start > position:
+                self._add(text[position:line_start], counts)
+                position = line_start
+            self.current = self.titles[match.group()]
+        self._add(text[position:], counts)
+        return counts
+
+    def _add(self, text, counts):
+        if self.current is not None:
+            counts[self.current] = counts.get(self.current, 0) + len(text.split())
+
+
+class SectionIndex:
+    """Ordered sections of one document, each mapped to a page range.
+
+    Built once per document, preferably from the PDF outline (bookmarks);
+    otherwise from a detected table-of-contents page. Lookups by page are a
+    binary search over the start pages.
+    """
+
+    def __init__(self, sections, num_pages, source="none"):
+        self.source = source  # "outline", "toc", "ocr_toc", "none" or "given"
+        self.num_pages = num_pages  # None leaves the last section open-ended
+        starts = {}
+        for title, start_page in sections:
+            if 1 <= start_page and (num_pages is None or start_page <= num_pages) and start_page not in starts:
+                starts[start_page] = title
+        pages = sorted(starts)
+        self.sections = [Section(starts[page], page, (pages[i + 1] - 1) if i + 1 < len(pages) else num_pages)
+                         for i, page in enumerate(pages)]
+        self._starts = pages
+
+    @classmethod
+    def from_dict(cls, sections, num_pages=None):
+        """Wraps a legacy {start page: title} mapping."""
+        return cls([(title, page) for page, title in sections.items()], num_pages, "given")
+
+    @classmethod
+    def build(cls, page_source, scan_pages=TOC_SCAN_PAGES, texts=None):
+        """Returns the outline-based index, falling back to a TOC page, then to an empty index.
+
+        `texts`, if given, receives {page: text layer} for every page scanned for a TOC, so the page
+        pass can reuse them instead of extracting those pages again.
+        """
+        outline = cls.outline_sections(page_source.reader)
+        if outline:
+            return cls(outline, page_source.num_pages, "outline")
+        for page_number in range(1, min(scan_pages, page_source.num_pages) + 1):
+            text = page_source.extract_text(page_number)
+            if texts is not None:
+                texts[page_number] = text
+            entries = cls.toc_entries(text)
+            if entries:
+                return cls(entries, page_source.num_pages, "toc")
+        return cls([], page_source.num_pages)
+
+    @staticmethod
+    def outline_sections(reader):
+        """Returns [(title, 1-based page)] for the top level of the outline.
+
+        A single top-level entry (usually the document title wrapping
+        everything) is skipped in favour of its children.
+        """
+        try:
+            outline = reader.outline
+        except Exception:  # Broken outline trees are common; treat them as absent
+            return []
+        while len(outline) == 2 and not isinstance(outline[0], list) and isinstance(outline[1], list):
+            outline = outline[1]
+        sections = []
+        for item in outline:
+            if isinstance(item, list):
+                continue
+            try:
+                page_index = reader.get_destination_page_number(item)
+            except Exception:
+                continue
+            if page_index is not None and page_index >= 0:
+                sections.append((str(item.title).strip(), page_index + 1))
+        return sections
+
+    @staticmethod
+    def toc_entries(text):
+        """Returns [(title, page)] if `text` looks like a table of contents, else []."""
+        entries = [(match.group(2).strip(" ."), int(match.group(3))) for match in TOC_LINE.finditer(text)
+                   if match.group(1) or "..." in match.group(0)]
+        if len(entries) < MIN_TOC_ENTRIES and TOC_KEYWORDS.search(text):
+            entries = [(title.strip(), int(page)) for _, title, page in INLINE_TOC_ENTRY.findall(text)]
+        if len(entries) < MIN_TOC_ENTRIES:
+            return []
+        pages = [page for _, page in entries]
+        ascending = sum(later >= earlier for earlier, later in zip(pages, pages[1:]))
+        return entries if ascending >= 0.8 * (len(pages) - 1) else []
+
+    def section_for_page(self, page_number):
+        """Returns the Section containing `page_number`, or None before the first section."""
+        i = bisect.bisect_right(self._starts, page_number) - 1
+        return self.sections[i] if i >= 0 else None
+
+    def as_dict(self):
+        """{start page: title}, the shape `indexed_sections` has always had."""
+        return {section.start_page: section.title for section in self.sections}
+
+    def to_list(self):
+        return [section._asdict() for section in self.sections]
+
+    def __len__(self):
+        return len(self.sections)
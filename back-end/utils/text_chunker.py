@@ -0,0 +1,134 @@
+import math
+import re
+from collections import namedtuple
+from utils.metrics import span
+
+# Context windows we run each model with (passed to Ollama as `num_ctx`, so nothing is silently cut at its default)
+MODEL_CONTEXT_TOKENS = {
+    "deepseek-r1:1.5b": 8192,
+}
+DEFAULT_CONTEXT_TOKENS = 4096
+OUTPUT_RESERVE_TOKENS = 2048  # Room left in the window for the model's reasoning and summary
+PROMPT_RESERVE_TOKENS = 256  # The fixed instructions wrapped around each chunk
+CHARS_PER_TOKEN = 3.5  # Conservative for English BPE vocabularies (~4 chars/token), so estimates err high
+OVERLAP_TOKENS = 128  # Trailing sentences repeated at the start of the next chunk within a section
+MIN_FILL = 0.25  # A chunk is only closed at a section start once it holds at least this share of the budget
+SECTION_JOINER = " / "  # Between the titles of sections that share one chunk
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+|\n\s*\n')
+
+Chunk = namedtuple("Chunk", "text tokens first_page last_page section")
+
+
+def estimate_tokens(text):
+    """Cheap token estimate from character count (no tokenizer needed on the hot path)."""
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN)) if text else 0
+
+
+def chunk_token_budget(model, context_tokens=None):
+    """Tokens of document text that fit in one prompt for `model`."""
+    context = context_tokens or MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    return max(256, context - OUTPUT_RESERVE_TOKENS - PROMPT_RESERVE_TOKENS)
+
+
+def split_sentences(text):
+    """Splits text into sentences on terminal punctuation and blank lines, collapsing whitespace."""
+    sentences = []
+    for piece in SENTENCE_BOUNDARY.split(text):
+        sentence = " ".join(piece.split()) if piece else ""
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+class TextChunker:
+    """Packs whole sentences from a stream of pages into chunks that fit a token budget.
+
+    Pages are added in order. A chunk is closed before a sentence that would
+    overflow the budget, and at the first page of every indexed section once
+    the chunk is at least `MIN_FILL` full (smaller sections share a chunk
+    rather than costing a call each, and the chunk is titled with all of
+    them). A sentence longer than the whole budget is the only thing ever
+    split, on word boundaries. Within a section, the
+    last `overlap_tokens` worth of sentences are repeated at the start of the
+    next chunk so the model sees context across the cut.
+    """
+
+    def __init__(self, token_budget, overlap_tokens=OVERLAP_TOKENS, sections=None):
+        self.token_budget = token_budget
+        self.overlap_tokens = min(overlap_tokens, token_budget // 4)
+        self.sections = sections or {}  # {start page: title}, as built by extract_indexed_sections
+        self._sentences = []  # (sentence, tokens) in the open chunk
+        self._tokens = 0
+        self._first_page = None
+        self._last_page = None
+        self._section = None  # Section in effect for text added from now on
+        self._titles = []  # Sections with text in the open chunk, in order
+        self._fresh = 0  # Sentences in the open chunk that are not overlap from the previous one
+
+    def add_page(self, text, page_number=None):
+        """Adds one page and returns the chunks it completed (possibly none)."""
+        with span("chunking", len(text), page=page_number) as record:
+            chunks = []
+            if page_number in self.sections:
+                if self._fresh and self._tokens >= self.token_budget * MIN_FILL:
+                    chunks.append(self._close(overlap=False))
+                elif not self._fresh:
+                    self._reset()  # Drop overlap carried from the previous section
+                self._section = self.sections[page_number]
+
+            for sentence in split_sentences(text):
+                for piece, tokens in self._fit(sentence):
+                    if self._fresh and self._tokens + tokens + 1 > self.token_budget:
+                        chunks.append(self._close(overlap=True))
+                    if self._first_page is None:
+                        self._first_page = page_number
+                    self._last_page = page_number
+                    if self._section is not None and self._section not in self._titles:
+                        self._titles.append(self._section)
+                    self._sentences.append((piece, tokens))
+                    self._tokens += tokens + 1
+                    self._fresh += 1
+            record.attributes["chunks"] = len(chunks)
+        return chunks
+
+    def flush(self):
+        """Returns the final partial chunk, if it holds any new text."""
+        return [self._close(overlap=False)] if self._fresh else []
+
+    def chunk_text(self, text):
+        """Chunks a whole document at once."""
+        return self.add_page(text) + self.flush()
+
+    def _fit(self, sentence):
+        """Yields (text, tokens) pieces of a sentence, splitting it on words only if it exceeds the budget."""
+        tokens = estimate_tokens(sentence)
+        if tokens <= self.token_budget - self.overlap_tokens:
+            yield sentence, tokens
+            return
+        words_per_piece = max(1, int((self.token_budget - self.overlap_tokens) * CHARS_PER_TOKEN) // 8)
+        words = sentence.split()
+        for i in range(0, len(words), words_per_piece):
+            piece = " ".join(words[i:i + words_per_piece])
+            yield piece, estimate_tokens(piece)
+
+    def _close(self, overlap):
+        chunk = Chunk(" ".join(sentence for sentence, _ in self._sentences), self._tokens,
+                      self._first_page, self._last_page, SECTION_JOINER.join(self._titles) or None)
+        carried = []
+        if overlap:
+            tokens = 0
+            for sentence, sentence_tokens in reversed(self._sentences):
+                if tokens + sentence_tokens > self.overlap_tokens:
+                    break
+                carried.insert(0, (sentence, sentence_tokens))
+                tokens += sentence_tokens + 1
+        self._reset(carried)
+        return chunk
+
+    def _reset(self, carried=()):
+        self._sentences = list(carried)
+        self._tokens = sum(tokens + 1 for _, tokens in self._sentences)
+        self._first_page = self._last_page if self._sentences else None
+        self._titles = [self._section] if self._sentences and self._section is not None else []  # Overlap's section
+        self._fresh = 0
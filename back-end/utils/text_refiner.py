@@ -1,8 +1,4 @@
-import re
-import nltk
-
-# Ensure NLTK tokenizer data is available
-nltk.download('punkt')
+from utils.text_normalizer import normalize_text, REFINE_MODE
 
 
 class TextRefiner:
@@ -12,15 +8,8 @@ class TextRefiner:
         self.text = text
 
     def remove_unwanted_patterns(self):
-        """Removes common numerical/statistical anomalies and gibberish text."""
-        # Remove excessive whitespace and line breaks
-        self.text = re.sub(r'\n+', ' ', self.text)
-        self.text = re.sub(r'\s+', ' ', self.text).strip()
-
-        # Remove isolated numbers or gibberish characters
-        self.text = re.sub(r'\b\d{3,}\b', '', self.text)  # Remove long isolated numbers
-        self.text = re.sub(r'[^a-zA-Z0-9\s,.\-\'"()\[\]%]', '', self.text)  # Remove special characters except punctuation
-
+        """Removes common numerical/statistical anomalies and gibberish text (see TextNormalizer)."""
+        self.text = normalize_text(self.text, REFINE_MODE)
         return self.text
 
     def refine_text(self):
@@ -1,49 +1,144 @@
 import re
-import nltk
-from nltk.tokenize import sent_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from collections import defaultdict
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import HashingVectorizer
+from utils.text_chunker import split_sentences
+
+N_FEATURES = 2 ** 20  # Hash buckets; collisions between top terms are rare at this width
+BATCH_SENTENCES = 4096  # Sentences vectorized together; bounds the size of each sparse batch
+MAX_TERM_NAMES = 200_000  # Bucket -> n-gram names kept for reporting; the lightest are dropped beyond this
+DEFAULT_SECTION = "General Overview"
+HEADING = re.compile(r'^\s*\d+\.\s[A-Z].*$', re.MULTILINE)  # Headings like '1. State of the Economy'
 
-# Download required NLTK resources
-nltk.download('punkt')
 
 class TopicExtractor:
     """
-    Extracts key topics from a text using TF-IDF for structured summary generation.
+    Extracts key topics from a stream of sentences with hashed, sparse TF-IDF weights.
+
+    Sentences are vectorized in batches into hash buckets (no vocabulary to
+    fit or grow), each row is L2-normalized and only the per-section column
+    sums and the global document frequencies are kept, as sparse vectors. Top
+    terms per section and for the whole text are weighted by the global IDF,
+    so everything comes from one pass over the text. Memory is bounded by the
+    number of distinct n-grams per section, never by the number of sentences,
+    and nothing is densified beyond a batch.
     """
 
-    def __init__(self, text, top_n=5):
-        self.text = text
+    def __init__(self, text="", top_n=5, n_features=N_FEATURES, batch_size=BATCH_SENTENCES,
+                 max_term_names=MAX_TERM_NAMES):
         self.top_n = top_n
+        self.n_features = n_features
+        self.batch_size = batch_size
+        self.max_term_names = max_term_names
+        self.analyzer = HashingVectorizer(stop_words="english", ngram_range=(1, 2)).build_analyzer()
+        self.hasher = FeatureHasher(n_features=n_features, input_type="string", alternate_sign=False)
+        self.sentence_count = 0
+        self.section_sums = {}  # {section: 1 x n_features sparse sum of normalized term weights}
+        self.document_frequency = sp.csr_matrix((1, n_features))
+        self.term_names = {}  # {bucket: n-gram}
+        self._batch = []
+        self._batch_section = None
+        if text:
+            self.add_text(text)
+
+    def add_text(self, text, section=DEFAULT_SECTION):
+        self.add_sentences(split_sentences(text), section)
+
+    def add_sentences(self, sentences, section=DEFAULT_SECTION):
+        if section != self._batch_section:
+            self.flush()
+            self._batch_section = section
+        for sentence in sentences:
+            self._batch.append(sentence)
+            if len(self._batch) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Folds the buffered sentences into the running sums."""
+        if not self._batch:
+            return
+        tokens = [self.analyzer(sentence) for sentence in self._batch]
+        self._batch = []
+        X = self.hasher.transform(tokens).tocsr()
+        self.sentence_count += X.shape[0]
+
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        X = sp.diags(1.0 / norms) @ X
+
+        columns, positions = np.unique(X.indices, return_inverse=True)
+        weights = self._row_vector(np.bincount(positions, weights=X.data), columns)
+        frequency = self._row_vector(np.bincount(positions).astype(float), columns)
+        section = self._batch_section
+        self.section_sums[section] = self.section_sums[section] + weights if section in self.section_sums else weights
+        self.document_frequency = self.document_frequency + frequency
+        self._name_terms({term for sentence in tokens for term in sentence})
+
+    def _row_vector(self, values, columns):
+        return sp.csr_matrix((values, columns, [0, len(columns)]), shape=(1, self.n_features))
+
+    def _name_terms(self, terms):
+        """Remembers which n-gram each new bucket stands for, keeping the heaviest when over the cap."""
+        terms = list(terms)
+        buckets = self.hasher.transform([[term] for term in terms]).indices
+        for bucket, term in zip(buckets, terms):
+            self.term_names.setdefault(bucket, term)
+        if len(self.term_names) > self.max_term_names:
+            totals = self.global_sums()
+            weight = dict(zip(totals.indices, totals.data))
+            ranked = sorted(self.term_names, key=lambda bucket: weight.get(bucket, 0.0), reverse=True)
+            self.term_names = {bucket: self.term_names[bucket] for bucket in ranked[:self.max_term_names // 2]}
+
+    def global_sums(self):
+        self.flush()
+        total = sp.csr_matrix((1, self.n_features))
+        for sums in self.section_sums.values():
+            total = total + sums
+        return total
+
+    def idf(self, columns):
+        """Smoothed IDF over all sentences seen, as TfidfVectorizer computes it."""
+        frequency = self.document_frequency[0, columns].toarray().ravel()
+        return np.log((1 + self.sentence_count) / (1 + frequency)) + 1
+
+    def top_terms(self, section=None, top_n=None):
+        """Returns the `top_n` highest-weighted n-grams of `section`, or of the whole text when None."""
+        self.flush()
+        sums = self.global_sums() if section is None else self.section_sums.get(section)
+        if sums is None or sums.nnz == 0:
+            return []
+        scores = sums.data * self.idf(sums.indices)
+        order = np.argsort(-scores, kind="stable")
+        top_n = top_n or self.top_n
+        terms = []
+        for i in order:
+            term = self.term_names.get(sums.indices[i])
+            if term is not None:
+                terms.append(term)
+                if len(terms) == top_n:
+                    break
+        return terms
+
+    def section_topics(self, top_n=None):
+        """Returns [(section, top terms)] in the order sections were first seen."""
+        self.flush()
+        return [(section, self.top_terms(section, top_n)) for section in self.section_sums]
+
 
 def extract_key_topics(text, top_n=10):
     """
     Extracts key topics dynamically but ensures all major sections get equal weightage.
     """
-    sections = defaultdict(str)
-    sentences = sent_tokenize(text)
-    
+    extractor = TopicExtractor(top_n=top_n)
+
     # Divide the text into sections based on common headings
-    current_section = "General Overview"
-    
-    for sent in sentences:
-        if re.match(r"^\d+\.\s[A-Z]", sent):  # Matches headings like '1. State of the Economy'
-            current_section = sent.strip()
-        
-        sections[current_section] += " " + sent.strip()
-    
-    # Apply TF-IDF only **within** each major section
-    vectorizer = TfidfVectorizer(stop_words="english", ngram_range=(1, 2))
-    
-    extracted_topics = []
-    
-    for section, content in sections.items():
-        X = vectorizer.fit_transform(sent_tokenize(content))
-        feature_array = vectorizer.get_feature_names_out()
-        tfidf_scores = X.toarray().sum(axis=0)
-        sorted_indices = tfidf_scores.argsort()[::-1]
-        
-        top_terms = [feature_array[idx] for idx in sorted_indices[:top_n]]
-        extracted_topics.append((section, top_terms))
-    
-    return extracted_topics
\ No newline at end of file
+    current_section = DEFAULT_SECTION
+    position = 0
+    for match in HEADING.finditer(text):
+        extractor.add_text(text[position:match.start()], current_section)
+        current_section = match.group().strip()
+        position = match.start()
+    extractor.add_text(text[position:], current_section)
+
+    return extractor.section_topics()
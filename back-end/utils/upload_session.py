@@ -0,0 +1,193 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class ChunkError(ValueError):
+    """Raised when a chunk does not fit the session (bad index, size or checksum)."""
+
+
+class UploadClosedError(ChunkError):
+    """Raised for a chunk sent after the upload was claimed for processing (the file is no longer written)."""
+
+
+class UploadSession:
+    """Offset-addressed upload of one file, written chunk by chunk in any order.
+
+    The target file is preallocated to its final size and every chunk is
+    written at `index * chunk_size` with `os.pwrite`, so chunks may arrive
+    concurrently, out of order or more than once. A bitmap of received chunks
+    is persisted next to the file so an interrupted upload can be resumed,
+    even across server restarts. Once the upload is claimed for processing
+    the file is read-only: later chunks are rejected.
+    """
+
+    def __init__(self, upload_id, filename, file_path, file_size, chunk_size, bitmap=None, job_id=None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.file_path = file_path
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.total_chunks = max(1, -(-file_size // chunk_size))
+        self.bitmap = bitmap if bitmap is not None else bytearray(-(-self.total_chunks // 8))
+        self.job_id = job_id
+        self._writers = 0  # Chunk writes in progress; the upload cannot be claimed while any remain
+        self._lock = threading.Lock()
+
+    @property
+    def state_path(self):
+        return session_state_path(os.path.dirname(self.file_path), self.upload_id)
+
+    @classmethod
+    def create(cls, upload_dir, filename, file_size, chunk_size):
+        """Starts a session and preallocates the target file."""
+        if file_size <= 0 or chunk_size <= 0:
+            raise ChunkError("fileSize and chunkSize must be positive")
+        upload_id = uuid.uuid4().hex
+        session = cls(upload_id, filename, os.path.join(upload_dir, filename), file_size, chunk_size)
+        with open(session.file_path, "wb") as f:
+            f.truncate(file_size)
+        session._save()
+        return session
+
+    @classmethod
+    def load(cls, upload_dir, upload_id):
+        """Restores a session from its state file; returns None if there is no such session."""
+        try:
+            with open(session_state_path(upload_dir, upload_id), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(upload_id, state["filename"], os.path.join(upload_dir, state["filename"]),
+                   state["file_size"], state["chunk_size"], bytearray(base64.b64decode(state["bitmap"])),
+                   state.get("job_id"))
+
+    def chunk_length(self, index):
+        """Returns the exact byte length chunk `index` must have."""
+        if not 0 <= index < self.total_chunks:
+            raise ChunkError(f"chunkIndex {index} outside 0..{self.total_chunks - 1}")
+        return min(self.chunk_size, self.file_size - index * self.chunk_size)
+
+    def has_chunk(self, index):
+        return bool(self.bitmap[index >> 3] & (1 << (index & 7)))
+
+    def write_chunk(self, index, data, checksum=None):
+        """Verifies a chunk and writes it at its offset; re-sending a chunk simply overwrites it."""
+        expected = self.chunk_length(index)
+        if len(data) != expected:
+            raise ChunkError(f"Chunk {index} has {len(data)} bytes, expected {expected}")
+        if checksum and hashlib.sha256(data).hexdigest() != checksum.lower():
+            raise ChunkError(f"Checksum mismatch for chunk {index}")
+
+        with self._lock:
+            if self.job_id is not None:
+                raise UploadClosedError("Upload is complete and already claimed for processing")
+            self._writers += 1
+        written = False
+        try:
+            fd = os.open(self.file_path, os.O_WRONLY)
+            try:
+                os.pwrite(fd, data, index * self.chunk_size)
+            finally:
+                os.close(fd)
+            written = True
+        finally:
+            with self._lock:
+                self._writers -= 1
+                if written:
+                    self.bitmap[index >> 3] |= 1 << (index & 7)
+                    self._save()
+
+    def received_count(self):
+        return sum(bin(byte).count("1") for byte in self.bitmap)
+
+    def missing_chunks(self):
+        return [index for index in range(self.total_chunks) if not self.has_chunk(index)]
+
+    def is_complete(self):
+        return self.received_count() == self.total_chunks
+
+    def claim_for_processing(self):
+        """Returns True exactly once, once every chunk is written and no write is still in progress."""
+        with self._lock:
+            if self.job_id is not None or self._writers or not self.is_complete():
+                return False
+            self.job_id = "pending"
+            return True
+
+    def set_job(self, job_id):
+        with self._lock:
+            self.job_id = job_id
+            self._save()
+
+    def to_dict(self):
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "file_size": self.file_size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": self.received_count(),
+            "missing_chunks": self.missing_chunks(),
+            "progress_percent": int(self.received_count() / self.total_chunks * 100),
+            "complete": self.is_complete(),
+            "job_id": self.job_id,
+        }
+
+    def _save(self):
+        """Persists the session state atomically (caller holds the lock, or owns the session)."""
+        state = {
+            "filename": self.filename,
+            "file_size": self.file_size,
+            "chunk_size": self.chunk_size,
+            "bitmap": base64.b64encode(bytes(self.bitmap)).decode("ascii"),
+            "job_id": self.job_id,
+        }
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def session_state_path(upload_dir, upload_id):
+    """Returns where a session's state lives, rejecting ids that are not plain hex."""
+    if not upload_id or any(c not in "0123456789abcdef" for c in upload_id):
+        raise ChunkError("Invalid uploadId")
+    return os.path.join(upload_dir, f"{upload_id}.upload.json")
+
+
+def sweep_upload_sessions(upload_dir, max_age):
+    """Expires sessions idle for `max_age` seconds: drops their state, and the partial file if never queued."""
+    if not os.path.isdir(upload_dir):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(upload_dir):
+        if not name.endswith(".upload.json"):
+            continue
+        path = os.path.join(upload_dir, name)
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("job_id") is None:  # Abandoned: the preallocated file was never processed
+                os.remove(os.path.join(upload_dir, os.path.basename(state["filename"])))
+        except (OSError, ValueError, KeyError):
+            pass
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Hashes a file sequentially (used once an out-of-order upload is complete)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
@@ -4,6 +4,65 @@ import { useDropzone } from "react-dropzone";
 import "bootstrap/dist/css/bootstrap.min.css";
 
 const CHUNK_SIZE = 5 * 1024 * 1024; // 5MB per chunk
+const API_URL = "http://localhost:8000";
+const POLL_INTERVAL = 2000; // ms between job status checks
+const PARALLEL_UPLOADS = 4; // Chunks in flight at once
+const CHUNK_RETRIES = 3; // Attempts per chunk before giving up
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// 🔑 Identifies a file across page reloads so an interrupted upload can resume
+const resumeKey = (file) => `upload:${file.name}:${file.size}:${file.lastModified}`;
+
+// 🔒 SHA-256 of a chunk, verified by the server before the chunk is written
+const sha256Hex = async (blob) => {
+  const digest = await crypto.subtle.digest("SHA-256", await blob.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+};
+
+// 📂 Reuses a stored upload session when it is still valid, otherwise starts a new one
+const openUploadSession = async (file) => {
+  const storedId = localStorage.getItem(resumeKey(file));
+  if (storedId) {
+    try {
+      const { data } = await axios.get(`${API_URL}/upload-pdf-chunk/${storedId}`);
+      if (!data.job_id) return data;
+    } catch (error) {
+      // Unknown or expired session: fall through and start over
+    }
+  }
+  const form = new FormData();
+  form.append("filename", file.name);
+  form.append("fileSize", file.size);
+  form.append("chunkSize", CHUNK_SIZE);
+  const { data } = await axios.post(`${API_URL}/upload-sessions/`, form);
+  localStorage.setItem(resumeKey(file), data.upload_id);
+  return data;
+};
+
+// 🏁 Queues processing once every chunk is stored, waiting out "server busy" (429) answers
+const finalizeUpload = async (uploadId) => {
+  for (;;) {
+    try {
+      const { data } = await axios.post(`${API_URL}/upload-sessions/${uploadId}/finalize`, new FormData());
+      return data.job_id;
+    } catch (error) {
+      const status = error.response?.status;
+      if (status !== 429 && !(status === 409 && error.response.headers["retry-after"])) throw error;
+      const retryAfter = Number(error.response.headers["retry-after"]) || POLL_INTERVAL / 1000;
+      await sleep(retryAfter * 1000);
+    }
+  }
+};
+
+// ⏳ Polls a processing job until its result is ready
+const waitForJobResult = async (jobId) => {
+  for (;;) {
+    const response = await axios.get(`${API_URL}/jobs/${jobId}/result`);
+    if (response.status === 200) return response.data;
+    await sleep(POLL_INTERVAL);
+  }
+};
 
 const App = () => {
   const [selectedFile, setSelectedFile] = useState(null);
@@ -29,42 +88,56 @@ const App = () => {
     setUploadProgress(0);
     setSummaryHtml("");
 
-    const totalChunks = Math.ceil(selectedFile.size / CHUNK_SIZE);
-    let uploadedChunks = 0;
-
-    for (let chunkIndex = 0; chunkIndex < totalChunks; chunkIndex++) {
-      const start = chunkIndex * CHUNK_SIZE;
-      const end = Math.min(start + CHUNK_SIZE, selectedFile.size);
-      const chunk = selectedFile.slice(start, end);
-
-      const formData = new FormData();
-      formData.append("file", chunk);
-      formData.append("chunkIndex", chunkIndex);
-      formData.append("totalChunks", totalChunks);
-      formData.append("filename", selectedFile.name);
-
-      try {
-        const response = await axios.post(
-          "http://localhost:8000/upload-pdf-chunk",
-          formData,
-          { headers: { "Content-Type": "multipart/form-data" } }
-        );
-
-        uploadedChunks++;
-        const progress = Math.round((uploadedChunks / totalChunks) * 100);
-        setUploadProgress(progress);
-
-        if (uploadedChunks === totalChunks) {
-          setSummaryHtml(response.data.summary_html || "<p>No summary generated.</p>");
-          setProcessing(false);
+    try {
+      const session = await openUploadSession(selectedFile);
+      const pending = [...session.missing_chunks];
+      let uploadedChunks = session.total_chunks - pending.length;
+      let jobId = null;
+      setUploadProgress(Math.round((uploadedChunks / session.total_chunks) * 100));
+
+      const uploadChunk = async (chunkIndex) => {
+        const start = chunkIndex * session.chunk_size;
+        const chunk = selectedFile.slice(start, Math.min(start + session.chunk_size, selectedFile.size));
+        const formData = new FormData();
+        formData.append("file", chunk);
+        formData.append("uploadId", session.upload_id);
+        formData.append("chunkIndex", chunkIndex);
+        formData.append("checksum", await sha256Hex(chunk));
+
+        for (let attempt = 1; ; attempt++) {
+          try {
+            const response = await axios.post(`${API_URL}/upload-pdf-chunk/`, formData);
+            if (response.data.job_id) jobId = response.data.job_id;
+            return;
+          } catch (error) {
+            // 429: the chunk is stored but the queue was full; 409: the upload is already queued.
+            // Either way the chunk is done and finalizeUpload takes over.
+            if ([409, 429].includes(error.response?.status)) return;
+            if (attempt >= CHUNK_RETRIES) throw error;
+            await sleep(attempt * 1000);
+          }
+        }
+      };
+
+      // 🚀 A few workers pull chunk indexes from the shared queue until it is empty
+      const worker = async () => {
+        while (pending.length) {
+          await uploadChunk(pending.shift());
+          uploadedChunks++;
+          setUploadProgress(Math.round((uploadedChunks / session.total_chunks) * 100));
         }
-      } catch (error) {
-        console.error("Upload failed:", error);
-        alert("Upload failed. Try again.");
-        setProcessing(false);
-        return;
-      }
+      };
+      await Promise.all(Array.from({ length: PARALLEL_UPLOADS }, worker));
+
+      jobId = jobId || (await finalizeUpload(session.upload_id));
+      localStorage.removeItem(resumeKey(selectedFile));
+      const result = await waitForJobResult(jobId);
+      setSummaryHtml(result.summary_html || "<p>No summary generated.</p>");
+    } catch (error) {
+      console.error("Upload failed:", error);
+      alert("Upload failed. Try again to resume where it stopped.");
     }
+    setProcessing(false);
   };
 
   const getProgressMessage = () => {